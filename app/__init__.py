@@ -17,10 +17,19 @@ def create_app(config_name='dev'):
     from app.routes.main_routes import main_bp
     from app.routes.encryption_routes import encryption_bp
     from app.routes.decryption_routes import decryption_bp
+    from app.routes.capture_routes import capture_bp
+    from app.routes.file_routes import file_bp
     
     app.register_blueprint(main_bp)
     app.register_blueprint(encryption_bp, url_prefix='/api/encryption')
     app.register_blueprint(decryption_bp, url_prefix='/api/decryption')
-    # 文件管理蓝图已移除
+    app.register_blueprint(capture_bp, url_prefix='/api/capture')
+    # 文件管理蓝图只保留下载功能
+    app.register_blueprint(file_bp, url_prefix='/files')
+    
+    # 编码/解码引擎默认在首次请求时导入；需要时可在启动阶段预加载
+    if app.config.get('PRELOAD_ENGINES'):
+        from app.utils.warmup import preload_engines
+        preload_engines(app.config['SSTV_SAMPLE_RATE'])
     
     return app
\ No newline at end of file
@@ -12,6 +12,11 @@ class Config:
     BASE_DIR = os.path.abspath(os.path.dirname(os.path.dirname(__file__)))
     UPLOAD_FOLDER = os.path.join(BASE_DIR, 'uploads')
     DATA_FOLDER = os.path.join(BASE_DIR, 'data')
+    ARCHIVE_FOLDER = os.path.join(DATA_FOLDER, 'archive')  # 连续监听模式的图像归档目录
+    DECODE_CACHE_FOLDER = os.path.join(DATA_FOLDER, 'decode_cache')  # 解码结果缓存目录
+    DECODE_CACHE_SIZE = 256  # 解码结果缓存的最大条目数
+    SEGMENT_CACHE_FOLDER = os.path.join(DATA_FOLDER, 'segment_cache')  # 播放列表单幅图像音频片段缓存目录
+    SEGMENT_CACHE_SIZE = 64  # 片段缓存的最大条目数
     
     # 文件命名格式
     @staticmethod
@@ -27,6 +32,25 @@ class Config:
     SSTV_SAMPLE_RATE = 44100
     SSTV_BITS = 16
     
+    # 编码时按块并行合成音频（输出与逐样本生成一致），线程数 0 表示等于 CPU 核数
+    ENCODER_PARALLEL = os.environ.get('SSTV_ENCODER_PARALLEL', '1') == '1'
+    ENCODER_THREADS = int(os.environ.get('SSTV_ENCODER_THREADS', '0'))
+    
+    # 启动时预加载编码/解码引擎（配合 Gunicorn preload_app 在 fork 前完成导入）
+    PRELOAD_ENGINES = os.environ.get('SSTV_PRELOAD_ENGINES') == '1'
+    
+    # 解码任务工作进程数，0 表示在当前进程内执行（见 app/utils/worker_pool.py）
+    WORKER_PROCESSES = int(os.environ.get('SSTV_WORKER_PROCESSES', '0'))
+    
+    # 音频采集服务配置
+    # 采集服务只存在于启动它的进程中，启用时必须以单个工作进程运行（见 gunicorn.conf.py）
+    CAPTURE_ENABLED = os.environ.get('SSTV_CAPTURE_ENABLED', '1') == '1'
+    CAPTURE_SOURCE = os.environ.get('SSTV_CAPTURE_SOURCE')  # 为空时使用声卡，否则为回放的音频文件路径
+    CAPTURE_DEVICE = os.environ.get('SSTV_CAPTURE_DEVICE')  # 声卡设备，为空时使用系统默认输入
+    CAPTURE_BUFFER_SECONDS = 300  # 环形缓冲区保留的音频时长
+    # 由VIS头触发的连续解码（见 app/decryption/monitor.py），图像写入 ARCHIVE_FOLDER
+    CAPTURE_MONITOR = os.environ.get('SSTV_CAPTURE_MONITOR', '1') == '1'
+    
 class DevelopmentConfig(Config):
     """开发环境配置"""
     DEBUG = True
@@ -34,6 +58,7 @@ class DevelopmentConfig(Config):
 class ProductionConfig(Config):
     """生产环境配置"""
     SECRET_KEY = os.environ.get('SECRET_KEY')  # 生产环境必须设置环境变量
+    CAPTURE_ENABLED = os.environ.get('SSTV_CAPTURE_ENABLED') == '1'  # 多进程部署默认不启用采集
 
 # 配置映射
 config_by_name = {
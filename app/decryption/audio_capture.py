@@ -0,0 +1,549 @@
+import os
+import time
+import platform
+import threading
+import itertools
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+import numpy as np
+
+
+class RingBuffer:
+    """线程安全的单声道音频环形缓冲区
+
+    位置使用自启动以来的绝对样本序号表示，读者可以据此判断数据是否已被覆盖。
+    """
+
+    def __init__(self, capacity):
+        self.capacity = int(capacity)
+        self._data = np.zeros(self.capacity, dtype=np.float32)
+        self._written = 0
+        self._released = 0
+        self._closed = False
+        self._cond = threading.Condition()
+
+    @property
+    def total_written(self):
+        """累计写入的样本数"""
+        with self._cond:
+            return self._written
+
+    def write(self, samples, block=False):
+        """写入一块样本（在音频回调线程中调用，只做内存拷贝）
+
+        block 为 True 时等待读者释放足够空间，用于非实时输入源，避免覆盖未读数据；
+        超过缓冲区容量的块会被拆成不超过容量的若干段依次写入，不丢弃任何样本。
+        """
+        samples = np.asarray(samples, dtype=np.float32).reshape(-1)
+        if block:
+            for begin in range(0, len(samples), self.capacity):
+                self._write(samples[begin:begin + self.capacity], block=True)
+        else:
+            self._write(samples, block=False)
+
+    def _write(self, samples, block):
+        count = len(samples)
+        if count == 0:
+            return
+        if count > self.capacity:
+            samples = samples[-self.capacity:]
+        with self._cond:
+            if block:
+                self._cond.wait_for(
+                    lambda: self._written + count - self._released <= self.capacity or self._closed)
+            start = (self._written + count - len(samples)) % self.capacity
+            first = min(len(samples), self.capacity - start)
+            self._data[start:start + first] = samples[:first]
+            if first < len(samples):
+                self._data[:len(samples) - first] = samples[first:]
+            self._written += count
+            self._cond.notify_all()
+
+    def read(self, start, end):
+        """读取绝对位置 [start, end) 的样本
+
+        Returns:
+            tuple: (样本数组, 实际起始位置)，已被覆盖的部分会被跳过
+        """
+        with self._cond:
+            end = min(end, self._written)
+            start = max(start, self._written - self.capacity, 0)
+            if start >= end:
+                return np.zeros(0, dtype=np.float32), start
+            begin = start % self.capacity
+            count = end - start
+            first = min(count, self.capacity - begin)
+            data = np.empty(count, dtype=np.float32)
+            data[:first] = self._data[begin:begin + first]
+            if first < count:
+                data[first:] = self._data[:count - first]
+            return data, start
+
+    def wait_for(self, position, timeout=None):
+        """等待累计写入量达到 position，返回是否达到"""
+        with self._cond:
+            self._cond.wait_for(lambda: self._written >= position or self._closed, timeout)
+            return self._written >= position
+
+    def release(self, position):
+        """读者声明 position 之前的数据已处理完毕"""
+        with self._cond:
+            self._released = max(self._released, position)
+            self._cond.notify_all()
+
+    def close(self):
+        """唤醒所有等待者"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def reopen(self):
+        """重新开始接收写入（服务停止后再次启动时调用）
+
+        关闭前未读的数据不再等待读者，已释放位置推进到当前写入位置。
+        """
+        with self._cond:
+            self._closed = False
+            self._released = self._written
+            self._cond.notify_all()
+
+
+class AudioSource:
+    """音频输入源基类
+
+    子类在 start 中开始产生音频块，每块调用一次 callback(samples)，
+    samples 为 float32 单声道数组；输入结束时调用 on_end()。
+    """
+
+    sample_rate = 44100
+
+    def start(self, callback, on_end=None):
+        raise NotImplementedError
+
+    def stop(self):
+        pass
+
+
+class SoundDeviceSource(AudioSource):
+    """基于 sounddevice 回调模式的声卡输入源"""
+
+    def __init__(self, sample_rate=44100, device=None, blocksize=1024):
+        self.sample_rate = sample_rate
+        self.device = device
+        self.blocksize = blocksize
+        self._stream = None
+
+    def start(self, callback, on_end=None):
+        import sounddevice as sd
+
+        def _callback(indata, frames, time_info, status):
+            if status:
+                print(f"音频输入状态异常: {status}")
+            callback(indata[:, 0])
+
+        self._stream = sd.InputStream(samplerate=self.sample_rate,
+                                      channels=1,
+                                      dtype='float32',
+                                      blocksize=self.blocksize,
+                                      device=self.device,
+                                      callback=_callback)
+        self._stream.start()
+
+    def stop(self):
+        if self._stream is not None:
+            self._stream.stop()
+            self._stream.close()
+            self._stream = None
+
+
+class PyAudioSource(AudioSource):
+    """基于 pyaudio 回调模式的声卡输入源（Windows）"""
+
+    def __init__(self, sample_rate=44100, device=None, blocksize=1024):
+        self.sample_rate = sample_rate
+        self.device = device
+        self.blocksize = blocksize
+        self._pa = None
+        self._stream = None
+
+    def start(self, callback, on_end=None):
+        import pyaudio
+
+        def _callback(in_data, frame_count, time_info, status):
+            samples = np.frombuffer(in_data, dtype=np.int16).astype(np.float32) / 32767.0
+            callback(samples)
+            return (None, pyaudio.paContinue)
+
+        self._pa = pyaudio.PyAudio()
+        self._stream = self._pa.open(format=pyaudio.paInt16,
+                                     channels=1,
+                                     rate=self.sample_rate,
+                                     input=True,
+                                     input_device_index=self.device,
+                                     frames_per_buffer=self.blocksize,
+                                     stream_callback=_callback)
+        self._stream.start_stream()
+
+    def stop(self):
+        if self._stream is not None:
+            self._stream.stop_stream()
+            self._stream.close()
+            self._stream = None
+        if self._pa is not None:
+            self._pa.terminate()
+            self._pa = None
+
+
+class ThreadedAudioSource(AudioSource):
+    """在后台线程中逐块推送音频的输入源基类
+
+    realtime 为 True 时按采样率节拍推送，模拟真实声卡；否则尽可能快地推送。
+    """
+
+    def __init__(self, sample_rate=44100, realtime=True):
+        self.sample_rate = sample_rate
+        self.realtime = realtime
+        self._thread = None
+        self._stop_event = threading.Event()
+
+    def iter_blocks(self):
+        raise NotImplementedError
+
+    def start(self, callback, on_end=None):
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, args=(callback, on_end), daemon=True)
+        self._thread.start()
+
+    def _run(self, callback, on_end):
+        started = time.monotonic()
+        sent = 0
+        try:
+            for block in self.iter_blocks():
+                if self._stop_event.is_set():
+                    break
+                block = np.asarray(block, dtype=np.float32)
+                if block.ndim > 1:
+                    block = block.mean(axis=1)
+                callback(block)
+                sent += len(block)
+                if self.realtime:
+                    delay = started + sent / self.sample_rate - time.monotonic()
+                    if delay > 0:
+                        self._stop_event.wait(delay)
+        finally:
+            if on_end is not None:
+                on_end()
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=2)
+        self._thread = None
+
+
+class FileAudioSource(ThreadedAudioSource):
+    """音频文件输入源，用于无声卡环境（如无头 Linux 服务器）替代声卡"""
+
+    def __init__(self, path, blocksize=1024, realtime=True, loop=False):
+        import soundfile as sf
+
+        self.path = path
+        self.blocksize = blocksize
+        self.loop = loop
+        super().__init__(sf.info(path).samplerate, realtime)
+
+    def iter_blocks(self):
+        import soundfile as sf
+
+        while True:
+            for block in sf.blocks(self.path, blocksize=self.blocksize, dtype='float32'):
+                yield block
+            if not self.loop or self._stop_event.is_set():
+                break
+
+
+class PCMStreamSource(ThreadedAudioSource):
+    """原始 PCM 流输入源（16位有符号小端单声道），如标准输入"""
+
+    def __init__(self, stream, sample_rate=44100, blocksize=1024, realtime=False):
+        self.stream = stream
+        self.blocksize = blocksize
+        super().__init__(sample_rate, realtime)
+
+    def iter_blocks(self):
+        while True:
+            data = self.stream.read(self.blocksize * 2)
+            if not data:
+                break
+            data = data[:len(data) // 2 * 2]
+            yield np.frombuffer(data, dtype='<i2').astype(np.float32) / 32767.0
+
+
+class GeneratorAudioSource(ThreadedAudioSource):
+    """从任意可迭代对象获取音频块的输入源，用于测试或自定义数据来源"""
+
+    def __init__(self, blocks, sample_rate=44100, realtime=False):
+        self.blocks = blocks
+        super().__init__(sample_rate, realtime)
+
+    def iter_blocks(self):
+        return iter(self.blocks)
+
+
+def create_device_source(sample_rate=44100, device=None):
+    """根据操作系统选择声卡输入源"""
+    if platform.system() == 'Windows':
+        return PyAudioSource(sample_rate, device)
+    return SoundDeviceSource(sample_rate, device)
+
+
+def decode_to_event(audio, sample_rate, output_folder, prefix):
+    """解码一段音频并生成对应的事件字典"""
+    from app.decryption.sstv_decoder import SSTVDecoder
+
+    timestamp = datetime.now().strftime('%Y-%m-%d-%H-%M-%S')
+    image_filename = f"decoded-{prefix}-{timestamp}.jpg"
+    result = SSTVDecoder.decode_samples(audio, sample_rate,
+                                        os.path.join(output_folder, image_filename))
+    if result['success']:
+        return {'type': 'image', 'image_path': image_filename, 'mode': result.get('mode'),
+                'snr': result.get('snr'), 'partial': result.get('partial')}
+    return {'type': 'decode_failed', 'error': result.get('message') or result.get('error')}
+
+
+class AudioCaptureService:
+    """长期运行的音频采集服务
+
+    服务独占输入设备：设备回调只把样本写入环形缓冲区，后台线程把新样本交给
+    连续解码器，并把解码结果作为事件发布。HTTP 请求只读取缓冲区或订阅事件，
+    不再在请求内部阻塞录音。
+    """
+
+    def __init__(self, source, output_folder, decoder=None, buffer_seconds=300,
+                 chunk_seconds=0.5, max_events=200, worker_pool=None):
+        self.source = source
+        self.output_folder = output_folder
+        self.decoder = decoder
+        self.worker_pool = worker_pool
+        self.sample_rate = source.sample_rate
+        self.chunk_seconds = chunk_seconds
+        self.buffer = RingBuffer(int(buffer_seconds * self.sample_rate))
+
+        self._running = False
+        self._ended = threading.Event()
+        self._finished = threading.Event()
+        self._consumer = None
+        self._jobs = []
+        self._jobs_lock = threading.Lock()
+        self._job_ids = itertools.count(1)
+        self._executor = ThreadPoolExecutor(max_workers=2)
+
+        self._events = deque(maxlen=max_events)
+        self._event_ids = itertools.count(1)
+        self._last_event_id = 0
+        self._events_cond = threading.Condition()
+        self._listeners = []
+        self.started_at = None
+        self.overruns = 0
+
+    @property
+    def running(self):
+        return self._running
+
+    def start(self):
+        """打开输入设备并启动后台解码线程"""
+        if self._running:
+            return
+        self._running = True
+        self._ended.clear()
+        self._finished.clear()
+        self.started_at = time.time()
+        self.buffer.reopen()
+        self._consumer = threading.Thread(target=self._consume_loop, daemon=True)
+        self._consumer.start()
+        if getattr(self.source, 'realtime', True):
+            write = self.buffer.write
+        else:
+            def write(samples):
+                self.buffer.write(samples, block=True)
+        self.source.start(write, self._on_source_end)
+        self._publish('started', sample_rate=self.sample_rate)
+
+    def stop(self):
+        """关闭输入设备并等待后台线程退出"""
+        if not self._running:
+            return
+        self._running = False
+        self.buffer.close()
+        self.source.stop()
+        if self._consumer is not None and self._consumer is not threading.current_thread():
+            self._consumer.join(timeout=5)
+        self._consumer = None
+        self._publish('stopped')
+
+    def wait(self, timeout=None):
+        """等待输入源结束且剩余音频处理完毕（文件/生成器输入源），返回是否已结束"""
+        return self._finished.wait(timeout)
+
+    def _on_source_end(self):
+        self.buffer.close()
+        self._ended.set()
+
+    def status(self):
+        """获取服务状态"""
+        total = self.buffer.total_written
+        with self._jobs_lock:
+            pending = len(self._jobs)
+        return {
+            'running': self._running,
+            'sample_rate': self.sample_rate,
+            'captured_seconds': round(total / self.sample_rate, 2),
+            'buffer_seconds': self.buffer.capacity / self.sample_rate,
+            'pending_jobs': pending,
+            'overruns': self.overruns,
+            'last_event_id': self._last_event_id
+        }
+
+    def snapshot(self, seconds):
+        """获取缓冲区中最近 seconds 秒的音频"""
+        end = self.buffer.total_written
+        data, _ = self.buffer.read(end - int(seconds * self.sample_rate), end)
+        return data
+
+    def record(self, duration, timeout=None):
+        """阻塞调用线程直到录满 duration 秒的新音频并返回，不占用设备"""
+        start = self.buffer.total_written
+        end = start + int(duration * self.sample_rate)
+        self.buffer.wait_for(end, timeout if timeout is not None else duration * 2 + 5)
+        data, _ = self.buffer.read(start, end)
+        return data
+
+    def schedule_recording(self, duration):
+        """登记一个从现在开始、时长 duration 秒的录制解码任务，立即返回任务ID
+
+        录满后在后台解码，结果以 'image' 或 'decode_failed' 事件发布，事件带有 job_id。
+        """
+        job_id = next(self._job_ids)
+        start = self.buffer.total_written
+        with self._jobs_lock:
+            self._jobs.append((job_id, start, start + int(duration * self.sample_rate)))
+        self._publish('job_scheduled', job_id=job_id, duration=duration)
+        return job_id
+
+    def add_listener(self, listener):
+        """注册进程内事件监听函数 listener(event)"""
+        self._listeners.append(listener)
+
+    def get_events(self, since=0, timeout=0):
+        """获取ID大于 since 的事件，没有新事件时最多等待 timeout 秒（长轮询）"""
+        with self._events_cond:
+            self._events_cond.wait_for(lambda: self._last_event_id > since, timeout)
+            return [event for event in self._events if event['id'] > since]
+
+    def _publish(self, event_type, **payload):
+        event = dict(payload, type=event_type)
+        self._emit(event)
+
+    def _emit(self, event):
+        with self._events_cond:
+            event['id'] = next(self._event_ids)
+            event.setdefault('time', datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
+            self._events.append(event)
+            self._last_event_id = event['id']
+            self._events_cond.notify_all()
+        for listener in list(self._listeners):
+            try:
+                listener(event)
+            except Exception as e:
+                print(f"事件监听函数出错: {e}")
+
+    def _consume_loop(self):
+        position = self.buffer.total_written
+        chunk = max(1, int(self.chunk_seconds * self.sample_rate))
+        while True:
+            self.buffer.wait_for(position + chunk, timeout=self.chunk_seconds)
+            data, start = self.buffer.read(position, self.buffer.total_written)
+            if start > position:
+                self.overruns += 1
+                self._publish('overrun', lost_seconds=round((start - position) / self.sample_rate, 2))
+            position = start + len(data)
+
+            if len(data) and self.decoder is not None:
+                self._run_decoder(self.decoder.feed, data, self.sample_rate)
+            self._check_jobs(position)
+            self.buffer.release(position)
+
+            if not self._running or (self._ended.is_set() and position >= self.buffer.total_written):
+                break
+
+        if self.decoder is not None:
+            self._run_decoder(self.decoder.flush)
+        self._check_jobs(position, final=True)
+        self._finished.set()
+
+    def _run_decoder(self, method, *args):
+        try:
+            events = method(*args)
+        except Exception as e:
+            events = [{'type': 'decode_failed', 'error': str(e)}]
+        for event in events:
+            self._emit(event)
+
+    def _check_jobs(self, position, final=False):
+        with self._jobs_lock:
+            ready = [job for job in self._jobs if final or job[2] <= position]
+            self._jobs = [job for job in self._jobs if job not in ready]
+        for job_id, start, end in ready:
+            data, _ = self.buffer.read(start, end)
+            if self.worker_pool is not None:
+                # 在工作进程中解码，音频经共享内存传递
+                future = self.worker_pool.submit(decode_to_event, data, self.sample_rate,
+                                                 self.output_folder, f"job{job_id}")
+                future.add_done_callback(
+                    lambda future, job_id=job_id: self._finish_job(job_id, future))
+            else:
+                self._executor.submit(self._decode_job, job_id, data)
+
+    def _decode_job(self, job_id, data):
+        try:
+            event = decode_to_event(data, self.sample_rate, self.output_folder, f"job{job_id}")
+        except Exception as e:
+            event = {'type': 'decode_failed', 'error': str(e)}
+        event['job_id'] = job_id
+        self._emit(event)
+
+    def _finish_job(self, job_id, future):
+        try:
+            event = future.result()
+        except Exception as e:
+            event = {'type': 'decode_failed', 'error': str(e)}
+        event['job_id'] = job_id
+        self._emit(event)
+
+
+def create_capture_service(config, decoder=None, source=None):
+    """根据应用配置创建采集服务
+
+    CAPTURE_SOURCE 为空时使用声卡，否则视为音频文件路径（循环回放，用于无声卡环境）。
+    CAPTURE_MONITOR 启用时由VIS头触发连续解码，图像及元数据写入 ARCHIVE_FOLDER 归档。
+    WORKER_PROCESSES 大于 0 时录制解码任务交给共享内存工作进程池执行。
+    """
+    from app.utils.worker_pool import get_worker_pool
+
+    sample_rate = config.get('SSTV_SAMPLE_RATE', 44100)
+    if decoder is None and config.get('CAPTURE_MONITOR', True):
+        from app.decryption.monitor import TriggeredDecoder
+        from app.utils.image_archive import ImageArchive
+        decoder = TriggeredDecoder(ImageArchive(config['ARCHIVE_FOLDER']))
+    if source is None:
+        source_path = config.get('CAPTURE_SOURCE')
+        if source_path:
+            source = FileAudioSource(source_path, realtime=True, loop=True)
+        else:
+            source = create_device_source(sample_rate, config.get('CAPTURE_DEVICE'))
+    return AudioCaptureService(source,
+                               config['DATA_FOLDER'],
+                               decoder=decoder,
+                               buffer_seconds=config.get('CAPTURE_BUFFER_SECONDS', 300),
+                               worker_pool=get_worker_pool(config))
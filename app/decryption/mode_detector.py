@@ -0,0 +1,253 @@
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from app.decryption.tone_detector import (tone_energy, snr_db, moving_sum, FREQ_VIS_BIT1,
+                                          FREQ_SYNC, FREQ_VIS_BIT0, FREQ_LEADER)
+from app.utils.sstv_modes import MODE_SPECS, MODES_BY_VIS
+
+# VIS头时序 (ms)
+MSEC_VIS_BIT = 30
+VIS_BITS = 10  # 起始位 + 7个数据位 + 奇偶校验位 + 停止位
+
+# 粗扫描参数
+FRAME_MS = 10
+MIN_LEADER_MS = 150
+
+VIS_FREQS = (FREQ_VIS_BIT1, FREQ_SYNC, FREQ_VIS_BIT0)
+COARSE_FREQS = (FREQ_SYNC, FREQ_LEADER)
+
+
+class VISScanner:
+    """流式VIS头扫描器
+
+    先以 10 ms 不重叠帧计算 1200/1900 Hz 的 Goertzel 能量（一次矩阵乘法完成），
+    只在"1900 Hz 引导音 + 1200 Hz"处再对 30 ms 的比特窗口精确解码并做奇偶校验。
+    绝大多数音频只经过粗扫描，因此可以快速处理很长的录音。
+    """
+
+    def __init__(self, sample_rate, tone_ratio=0.5, bit_ratio=0.3):
+        self.sample_rate = sample_rate
+        self.tone_ratio = tone_ratio
+        self.bit_ratio = bit_ratio
+        self.frame = int(sample_rate * FRAME_MS / 1000)
+        self.bit = int(round(sample_rate * MSEC_VIS_BIT / 1000))
+        self.min_leader_frames = MIN_LEADER_MS // FRAME_MS
+        # 保留足够的尾部，保证跨块的VIS头能被完整解码
+        self.keep = self.frame * ((MIN_LEADER_MS + VIS_BITS * MSEC_VIS_BIT + 50) // FRAME_MS)
+
+        self._pending = np.zeros(0, dtype=np.float32)
+        self._pending_start = 0
+        self._last_found = -1
+
+    def feed(self, samples):
+        """送入一块样本，返回本块内新发现的VIS头列表"""
+        data = np.concatenate([self._pending, np.asarray(samples, dtype=np.float32)])
+        headers = self._scan(data, self._pending_start, final=False)
+        keep_from = max(0, (len(data) - self.keep) // self.frame * self.frame)
+        self._pending = data[keep_from:]
+        self._pending_start += keep_from
+        return headers
+
+    def flush(self):
+        """处理剩余样本"""
+        headers = self._scan(self._pending, self._pending_start, final=True)
+        self._pending = np.zeros(0, dtype=np.float32)
+        return headers
+
+    def _scan(self, data, base, final):
+        count = len(data) // self.frame
+        if count <= self.min_leader_frames:
+            return []
+        frames = data[:count * self.frame].reshape(count, self.frame)
+        energy = tone_energy(frames, COARSE_FREQS, self.sample_rate)
+        total = np.maximum(np.einsum('ij,ij->i', frames, frames, dtype=np.float64), 1e-12)
+        leader = energy[:, 1] / total > self.tone_ratio
+        sync = energy[:, 0] / total > self.tone_ratio
+
+        # 找出足够长的引导音段，其后紧跟 1200 Hz（间隔符或起始位）
+        edges = np.diff(np.concatenate([[0], leader.astype(np.int8), [0]]))
+        starts = np.flatnonzero(edges == 1)
+        ends = np.flatnonzero(edges == -1)
+        headers = []
+        for start, end in zip(starts, ends):
+            if end - start < self.min_leader_frames:
+                continue
+            if not sync[end:end + 3].any():
+                continue
+            approx = base + end * self.frame
+            if approx <= self._last_found:
+                continue
+            local = end * self.frame
+            if local + (VIS_BITS + 1) * self.bit > len(data):
+                if not final:
+                    # 比特还没收全，留到下一块
+                    break
+                continue
+            header = self._decode_bits(data, local)
+            if header is None:
+                continue
+            header['position'] = base + header.pop('offset')
+            header['image_start'] += base
+            header['time'] = round(header['position'] / self.sample_rate, 3)
+            header['snr'] = round(float(np.median(
+                snr_db(energy[start:end, 1], total[start:end]))), 1)
+            self._last_found = header['position'] + VIS_BITS * self.bit
+            headers.append(header)
+        return headers
+
+    def _decode_bits(self, data, approx):
+        """在粗略起始位位置附近对齐比特窗口并解码VIS码"""
+        step = max(1, self.sample_rate // 2000)
+        reach = self.frame
+        offsets = np.arange(max(0, approx - reach), approx + reach + 1, step)
+        offsets = offsets[offsets + VIS_BITS * self.bit <= len(data)]
+        if len(offsets) == 0:
+            return None
+
+        windows = sliding_window_view(data, self.bit)
+        index = offsets[:, None] + np.arange(VIS_BITS)[None, :] * self.bit
+        bit_frames = windows[index.reshape(-1)]
+        energy = tone_energy(bit_frames, VIS_FREQS, self.sample_rate)
+        total = np.maximum(np.einsum('ij,ij->i', bit_frames, bit_frames, dtype=np.float64), 1e-12)
+        share = (energy / total[:, None]).reshape(len(offsets), VIS_BITS, len(VIS_FREQS))
+
+        framing = share[:, 0, 1] + share[:, -1, 1]
+        data_bits = np.maximum(share[:, 1:-1, 0], share[:, 1:-1, 2])
+        best = int(np.argmax(framing + data_bits.sum(axis=1)))
+        share = share[best]
+
+        if share[0, 1] < self.bit_ratio or share[-1, 1] < self.bit_ratio:
+            return None
+        if (np.maximum(share[1:-1, 0], share[1:-1, 2]) < self.bit_ratio).any():
+            return None
+        bits = (share[1:-1, 0] > share[1:-1, 2]).astype(int)
+        if bits.sum() % 2 != 0:
+            # 偶校验失败
+            return None
+
+        code = int(sum(bit << i for i, bit in enumerate(bits[:7])))
+        spec = MODES_BY_VIS.get(code)
+        if spec is None:
+            return None
+        return {
+            'mode': spec['name'],
+            'vis_code': spec['vis_code'],
+            'offset': int(offsets[best]),
+            'image_start': int(offsets[best]) + VIS_BITS * self.bit,
+            'method': 'vis'
+        }
+
+
+def scan_vis(audio, sample_rate=44100):
+    """找出一段音频中的全部VIS头，可用于大批量录音的分拣和索引
+
+    Returns:
+        list: 每个VIS头为字典 {'mode', 'vis_code', 'position', 'time', 'image_start', 'snr', 'method'}
+    """
+    scanner = VISScanner(sample_rate)
+    headers = scanner.feed(_to_mono(audio))
+    headers.extend(scanner.flush())
+    return headers
+
+
+def scan_file(path, block_seconds=60):
+    """分块扫描音频文件中的全部VIS头，内存占用与文件长度无关"""
+    import soundfile as sf
+
+    sample_rate = sf.info(path).samplerate
+    scanner = VISScanner(sample_rate)
+    headers = []
+    for block in sf.blocks(path, blocksize=int(block_seconds * sample_rate), dtype='float32'):
+        headers.extend(scanner.feed(_to_mono(block)))
+    headers.extend(scanner.flush())
+    return headers
+
+
+def detect_mode(audio, sample_rate=44100, use_line_period=True):
+    """检测音频中第一段SSTV传输的模式
+
+    优先解码VIS头；没有找到有效VIS头时（可选）根据测得的行同步周期推断模式。
+
+    Returns:
+        dict: 检测结果，method 为 'vis' 或 'line_period'；无法识别时返回 None
+    """
+    audio = _to_mono(audio)
+    headers = scan_vis(audio, sample_rate)
+    if headers:
+        return headers[0]
+    if use_line_period:
+        return detect_mode_by_line_period(audio, sample_rate)
+    return None
+
+
+def find_sync_pulses(audio, sample_rate=44100, min_ms=3.0, ratio=0.5):
+    """用 1200 Hz 滑动 Goertzel 包络找出行同步脉冲
+
+    Returns:
+        tuple: (脉冲起点样本序号数组, 脉冲宽度毫秒数组)
+    """
+    audio = _to_mono(audio).astype(np.float64)
+    window = max(1, int(sample_rate * 0.002))
+    t = np.arange(len(audio))
+    mixed = audio * np.exp(-2j * np.pi * FREQ_SYNC * t / sample_rate)
+    tone = np.abs(moving_sum(mixed, window)) ** 2 * 2 / window
+    total = np.maximum(moving_sum(audio ** 2, window), 1e-12)
+    is_sync = tone / total > ratio
+
+    edges = np.diff(np.concatenate([[0], is_sync.astype(np.int8), [0]]))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+    widths = (ends - starts + window - 1) * 1000.0 / sample_rate
+    keep = widths >= min_ms
+    return starts[keep], widths[keep]
+
+
+def detect_mode_by_line_period(audio, sample_rate=44100, tolerance=0.02, max_seconds=30):
+    """没有VIS头时，根据行同步脉冲的周期和宽度推断模式
+
+    只分析前 max_seconds 秒（已包含足够多的行），避免对长录音做逐样本计算。
+    """
+    audio = _to_mono(audio)[:int(max_seconds * sample_rate)]
+    starts, widths = find_sync_pulses(audio, sample_rate)
+    if len(starts) < 4:
+        return None
+    intervals = np.diff(starts) * 1000.0 / sample_rate
+    intervals = intervals[intervals > 100]
+    if len(intervals) < 3:
+        return None
+    period = float(np.median(intervals))
+    sync_width = float(np.median(widths))
+
+    best = None
+    for spec in MODE_SPECS.values():
+        period_error = abs(period - spec['line_ms']) / spec['line_ms']
+        if period_error > tolerance:
+            continue
+        score = period_error + 0.01 * abs(sync_width - spec['sync_ms']) / spec['sync_ms']
+        if best is None or score < best[0]:
+            best = (score, spec)
+    if best is None:
+        return None
+    spec = best[1]
+
+    # 第一个与下一脉冲相隔一个行周期的脉冲才是行同步（Scottie 的起始同步脉冲之后
+    # 只隔G、B通道），图像起点在它之前 sync_lead_ms 处
+    period_samples = period * sample_rate / 1000
+    on_grid = np.flatnonzero(np.abs(np.diff(starts) - period_samples) < 0.05 * period_samples)
+    first_line = int(starts[on_grid[0]]) if len(on_grid) else int(starts[0])
+    image_start = first_line - int(round(spec['sync_lead_ms'] * sample_rate / 1000))
+    return {
+        'mode': spec['name'],
+        'vis_code': spec['vis_code'],
+        'position': int(starts[0]),
+        'time': round(float(starts[0]) / sample_rate, 3),
+        'image_start': image_start,
+        'line_ms': round(period, 3),
+        'method': 'line_period'
+    }
+
+
+def _to_mono(audio):
+    audio = np.asarray(audio, dtype=np.float32)
+    if audio.ndim > 1:
+        audio = audio.mean(axis=1)
+    return audio
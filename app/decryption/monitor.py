@@ -0,0 +1,176 @@
+import time
+from datetime import datetime, timedelta
+import numpy as np
+from app.decryption.mode_detector import VISScanner
+from app.decryption.tone_detector import ToneDetector
+from app.utils.sstv_modes import MAX_TRANSMISSION_SECONDS, VIS_HEADER_MS, get_mode_spec, image_seconds
+
+# 按模式计算录音时长上限时额外留出的比例（声卡时钟偏差等）
+DURATION_MARGIN = 0.02
+
+
+class TriggeredDecoder:
+    """由 VIS 头触发的连续解码器（实现采集服务的解码器接口）
+
+    空闲时只运行 ToneDetector；检测到传输开始后从引导音起点开始缓存音频，
+    直到 end_gap_seconds 内不再出现行同步脉冲（或超过录音时长上限）时解码，
+    并把图像及元数据写入归档。
+
+    录音时长上限默认按最长的模式（PasokonP7，约 407 秒）计算；录音开头解出VIS头后，
+    上限改为该模式的图像时长加 end_gap_seconds，因此显式传入较小的 max_seconds
+    也不会截断长模式的传输。
+
+    feed 接受任意长度的样本，内部按 step_seconds 切片逐段处理：文件/标准输入等
+    非实时输入源一次可能送入几分钟、包含多次传输的音频。
+
+    接收时间默认按当前时间倒推；非实时输入源应传入 start_time（音频第一个样本对应的时间），
+    接收时间改由样本位置计算。
+    """
+
+    def __init__(self, archive, preroll_seconds=1.0, end_gap_seconds=3.0,
+                 max_seconds=None, min_seconds=5, step_seconds=0.5, start_time=None):
+        self.archive = archive
+        self.preroll_seconds = preroll_seconds
+        self.end_gap_seconds = end_gap_seconds
+        if max_seconds is None:
+            max_seconds = (preroll_seconds + MAX_TRANSMISSION_SECONDS * (1 + DURATION_MARGIN)
+                           + end_gap_seconds)
+        self.max_seconds = max_seconds
+        self.min_seconds = min_seconds
+        self.step_seconds = step_seconds
+        self.start_time = start_time
+
+        self.detector = None
+        self.sample_rate = None
+        self._history = np.zeros(0, dtype=np.float32)
+        self._history_start = 0
+        self._position = 0
+        self._recording = None
+
+    @property
+    def recording(self):
+        return self._recording is not None
+
+    def feed(self, samples, sample_rate):
+        if self.detector is None:
+            self.sample_rate = sample_rate
+            self.detector = ToneDetector(sample_rate)
+
+        samples = np.asarray(samples, dtype=np.float32)
+        step = max(1, int(self.step_seconds * sample_rate))
+        events = []
+        for begin in range(0, len(samples), step):
+            events.extend(self._feed_step(samples[begin:begin + step]))
+        return events
+
+    def _feed_step(self, samples):
+        """处理一小段样本，其中至多包含一次传输的开始或结束"""
+        detections = self.detector.feed(samples)
+        chunk_start = self._position
+        self._position += len(samples)
+        events = []
+
+        if self._recording is None:
+            self._append_history(samples, chunk_start)
+            if detections:
+                events.append(self._start_recording(detections[0]))
+        else:
+            self._recording['chunks'].append(samples)
+            self._scan_vis(samples)
+
+        if self._recording is not None and self._should_finish():
+            events.extend(self._finish_recording())
+        return events
+
+    def flush(self):
+        if self._recording is None:
+            return []
+        return self._finish_recording()
+
+    def _append_history(self, samples, chunk_start):
+        keep = int(self.preroll_seconds * self.sample_rate)
+        self._history = np.concatenate([self._history, samples])[-keep:]
+        self._history_start = self._position - len(self._history)
+
+    def _start_recording(self, detection):
+        offset = max(detection['position'] - self._history_start, 0)
+        self._recording = {
+            'start': self._history_start + offset,
+            'chunks': [self._history[offset:]],
+            'snr': detection['snr'],
+            'received_at': self._received_at(detection['position']),
+            'limit': int(self.max_seconds * self.sample_rate),
+            'scanner': VISScanner(self.sample_rate)
+        }
+        self._scan_vis(self._recording['chunks'][0])
+        self._history = np.zeros(0, dtype=np.float32)
+        return {
+            'type': 'transmission_start',
+            'time': self._recording['received_at'].strftime('%Y-%m-%d %H:%M:%S'),
+            'snr': detection['snr']
+        }
+
+    def _scan_vis(self, samples):
+        """在录音开头查找VIS头，识别出模式后按该模式的时长设置录音上限"""
+        recording = self._recording
+        scanner = recording['scanner']
+        if scanner is None:
+            return
+        headers = scanner.feed(samples)
+        if headers:
+            spec = get_mode_spec(headers[0]['mode'])
+            recording['limit'] = headers[0]['image_start'] + int(
+                (image_seconds(spec) * (1 + DURATION_MARGIN) + self.end_gap_seconds) * self.sample_rate)
+            recording['scanner'] = None
+        elif (self._position - recording['start']
+              > (self.preroll_seconds + VIS_HEADER_MS / 1000 + 1) * self.sample_rate):
+            # 开头没有VIS头（例如从传输中途开始录音），保留默认上限
+            recording['scanner'] = None
+
+    def _received_at(self, position):
+        """样本位置对应的接收时间"""
+        if self.start_time is not None:
+            return self.start_time + timedelta(seconds=position / self.sample_rate)
+        return datetime.now() - timedelta(seconds=(self._position - position) / self.sample_rate)
+
+    def _should_finish(self):
+        start = self._recording['start']
+        last_sync = max(self.detector.last_sync_position or 0, start)
+        if (self._position - last_sync) > self.end_gap_seconds * self.sample_rate:
+            return True
+        return (self._position - start) > self._recording['limit']
+
+    def _finish_recording(self):
+        from app.decryption.sstv_decoder import SSTVDecoder
+
+        recording = self._recording
+        self._recording = None
+        self.detector.reset()
+
+        audio = np.concatenate(recording['chunks'])
+        # 去掉最后一个同步脉冲之后的静音/噪声尾部
+        last_sync = self.detector.last_sync_position
+        if last_sync is not None and last_sync > recording['start']:
+            tail = last_sync - recording['start'] + int(1.1 * self.sample_rate)
+            audio = audio[:tail]
+        duration = len(audio) / self.sample_rate
+        if duration < self.min_seconds:
+            return [{'type': 'transmission_discarded', 'duration': round(duration, 1)}]
+
+        received_at = recording['received_at']
+        image_path = self.archive.new_image_path(received_at)
+        started = time.perf_counter()
+        result = SSTVDecoder.decode_samples(audio, self.sample_rate, image_path)
+        if not result['success']:
+            return [{'type': 'decode_failed', 'error': result.get('message') or result.get('error')}]
+
+        entry = self.archive.add(image_path, {
+            'time': received_at.strftime('%Y-%m-%d %H:%M:%S'),
+            'mode': result.get('mode'),
+            'snr': result['snr'] if result.get('snr') is not None else recording['snr'],
+            'partial': result['partial'],
+            'lines_received': result['lines_received'],
+            'duration': round(duration, 1),
+            'decode_seconds': round(time.perf_counter() - started, 2)
+        })
+        return [dict(entry, type='image', image_path=entry['image'])]
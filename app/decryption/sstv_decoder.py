@@ -1,44 +1,119 @@
-import os
 import numpy as np
-import wave
-from PIL import Image
-import soundfile as sf
-import pysstv
+from numpy.lib.stride_tricks import sliding_window_view
+from app.decryption.mode_detector import detect_mode
+from app.decryption.sync_tracker import track_line_syncs
+from app.decryption.tone_detector import FREQ_BLACK, FREQ_WHITE
+from app.utils.sstv_modes import get_mode_spec
+
+# 解调采样率下限（SSTV信号带宽在 2.5 kHz 以内，降采样可减少计算量）
+DEMOD_SAMPLE_RATE = 22050
+
+# 解调带通滤波器通带 (Hz)
+DEMOD_BAND = (1000, 2600)
+
+# 自适应平滑：行信噪比低于 SMOOTH_START_DB 时开始平滑，低于 SMOOTH_FULL_DB 时完全使用中值滤波结果
+SMOOTH_START_DB = 20.0
+SMOOTH_FULL_DB = 8.0
+
+# 接收到的行数少于图像总行数的这一比例时不输出图像（其余行只能外推，没有意义）
+MIN_RECEIVED_FRACTION = 0.25
 
 class SSTVDecoder:
     """SSTV解码器类"""
     
+    # 解码算法版本，解码结果缓存以此区分不同版本的输出
+    VERSION = '4'
+    
     @staticmethod
     def decode_audio(audio_path, output_path):
         """从SSTV音频解码图像"""
+        import soundfile as sf
+        
         try:
             # 读取音频文件
             audio_data, sample_rate = sf.read(audio_path)
+        except Exception as e:
+            return {
+                "success": False,
+                "message": f"读取音频文件出错: {str(e)}"
+            }
+        
+        return SSTVDecoder.decode_samples(audio_data, sample_rate, output_path)
+    
+    @staticmethod
+    def decode_samples(audio_data, sample_rate, output_path, adaptive_smoothing=True):
+        """从内存中的音频样本解码图像（供文件解码和采集服务共用）
+        
+        adaptive_smoothing 为 True 时对信噪比低的行做中值滤波，信噪比高的行保持原样。
+        """
+        try:
+            audio_data = np.asarray(audio_data)
             
             # 如果是立体声，转换为单声道
             if len(audio_data.shape) > 1:
                 audio_data = np.mean(audio_data, axis=1)
             
-            # 转换为16位整数
-            audio_data = (audio_data * 32767).astype(np.int16)
+            # 识别SSTV模式（VIS头，缺失时根据行周期推断）
+            detection = detect_mode(audio_data, sample_rate, use_line_period=False)
+            if detection is None and len(audio_data) > sample_rate:
+                # 强噪声下宽带噪声会淹没VIS音调，滤除带外噪声后重试
+                detection = detect_mode(SSTVDecoder.bandpass(audio_data, sample_rate), sample_rate)
+            if detection is None:
+                return {
+                    "success": False,
+                    "message": "未检测到SSTV信号"
+                }
+            
+            spec = get_mode_spec(detection['mode'])
+            
+            # 只解调本次传输所在的片段
+            image_start = detection['image_start']
+            length = int(spec['line_ms'] * spec['height'] / spec['lines_per_sync'] * sample_rate / 1000 * 1.01)
+            begin = max(0, image_start - int(0.5 * sample_rate))
+            segment = audio_data[begin:image_start + length + int(0.5 * sample_rate)]
             
-            # 使用通用的解码方式
-            # 尝试直接使用pysstv中的核心功能
-            from pysstv import SSTV
+            # 解调为瞬时频率，定位全部行同步脉冲并拟合实际行周期（斜率校正）
+            freq, freq_rate = SSTVDecoder.demodulate(segment, sample_rate)
+            track = track_line_syncs(freq, freq_rate, spec, (image_start - begin) * freq_rate / sample_rate)
             
-            # 尝试解码（简化版本）
-            # 实际使用时可能需要根据具体pysstv版本调整
-            sstv = SSTV(44100, 16)
-            sstv.write_audio(audio_data)
-            img = sstv.render()
+            # 位于已接收音频内的行数（录音不完整时其余行只是外推；最后一行可能紧贴音频末尾）
+            syncs_received = int(np.count_nonzero(
+                (track['starts'] >= 0) & (track['starts'] + 0.9 * track['period'] <= len(freq))))
+            lines_received = syncs_received * spec['lines_per_sync']
+            if lines_received < MIN_RECEIVED_FRACTION * spec['height']:
+                return {
+                    "success": False,
+                    "message": f"录音不完整，只接收到 {lines_received}/{spec['height']} 行",
+                    "mode": detection['mode'],
+                    "lines_received": lines_received
+                }
+            values = SSTVDecoder.integrate_pixels(freq, freq_rate, spec, track['starts'], track['period'])
+            line_snr = SSTVDecoder.estimate_line_snr(freq, freq_rate, spec, track['starts'], track['period'])
+            img = SSTVDecoder.channels_to_image(values, spec)
+            if adaptive_smoothing:
+                img = SSTVDecoder.smooth_image(img, line_snr)
             
             # 保存解码后的图像
             img.save(output_path)
             
+            # 只统计实际接收到的行
+            received = line_snr[~np.isnan(line_snr)]
+            snr = round(float(np.median(received)), 1) if len(received) else None
+            snr_min = round(float(np.min(received)), 1) if len(received) else None
+            
             return {
                 "success": True,
                 "message": "成功解码音频",
-                "output_path": output_path
+                "output_path": output_path,
+                "mode": detection['mode'],
+                "detection": detection['method'],
+                "drift_ppm": track['drift_ppm'],
+                "lines_received": lines_received,
+                "lines_total": spec['height'],
+                "partial": lines_received < spec['height'],
+                "sync_matched": track['matched'],
+                "snr": snr,
+                "snr_min": snr_min
             }
             
         except Exception as e:
@@ -48,6 +123,178 @@ class SSTVDecoder:
                 "message": f"解码过程出错: {str(e)}"
             }
     
+    @staticmethod
+    def bandpass(audio_data, sample_rate):
+        """零相位带通滤波，只保留SSTV信号所在频段"""
+        from scipy.signal import butter, sosfiltfilt
+        
+        sos = butter(4, list(DEMOD_BAND), btype='bandpass', fs=sample_rate, output='sos')
+        return sosfiltfilt(sos, np.asarray(audio_data, dtype=np.float64))
+    
+    @staticmethod
+    def demodulate(audio_data, sample_rate):
+        """带通滤波后用解析信号计算每个样本的瞬时频率
+        
+        Returns:
+            tuple: (瞬时频率序列, 频率序列的采样率)
+        """
+        from scipy.fft import next_fast_len
+        from scipy.signal import hilbert, resample_poly
+        
+        audio = np.asarray(audio_data, dtype=np.float64)
+        factor = max(1, int(sample_rate // DEMOD_SAMPLE_RATE))
+        if factor > 1:
+            audio = resample_poly(audio, 1, factor)
+            sample_rate = sample_rate / factor
+        
+        audio = SSTVDecoder.bandpass(audio, sample_rate)
+        analytic = hilbert(audio, next_fast_len(len(audio)))[:len(audio)]
+        
+        # 相邻样本的相位差即瞬时角频率，无需相位展开
+        phase_step = np.angle(analytic[1:] * np.conj(analytic[:-1]))
+        freq = np.concatenate([phase_step[:1], phase_step]) * sample_rate / (2 * np.pi)
+        return freq, sample_rate
+    
+    @staticmethod
+    def integrate_pixels(freq, sample_rate, spec, line_starts, period):
+        """对每个像素的时间窗口内的瞬时频率求平均，得到各通道像素值
+        
+        先对频率序列求一次累加和，每个像素的平均值只需窗口两端累加和之差（两端按小数位置
+        线性插值），计算量与像素时长无关，且比单点采样平均掉了窗口内的噪声。行内时间按实测
+        行周期与名义行周期之比缩放，补偿收发两端的采样率偏差。
+        
+        Returns:
+            ndarray: 形状为 通道数 x 同步行数 x 宽度 的像素值（0~255）
+        """
+        scale = period / (spec['line_ms'] * sample_rate / 1000)
+        samples_per_ms = sample_rate / 1000 * scale
+        edges = np.arange(spec['width'] + 1) / spec['width']
+        cumulative = np.concatenate([[0.0], np.cumsum(freq)])
+        sample_index = np.arange(len(cumulative))
+        
+        channels = []
+        for offset, scan in spec['channels']:
+            positions = line_starts[:, None] + (offset + edges[None, :] * scan) * samples_per_ms
+            integral = np.interp(positions, sample_index, cumulative)
+            channels.append(np.diff(integral, axis=1) / np.maximum(np.diff(positions, axis=1), 1e-9))
+        return np.clip((np.stack(channels) - FREQ_BLACK) / (FREQ_WHITE - FREQ_BLACK) * 255, 0, 255)
+    
+    @staticmethod
+    def estimate_line_snr(freq, sample_rate, spec, line_starts, period):
+        """根据每行同步脉冲期间瞬时频率的抖动估计该行的信噪比 (dB)
+        
+        同步脉冲是已知的恒定 1200 Hz 音调，其间频率的方差完全来自噪声。取脉冲中间
+        60% 的样本（避开边沿），用频率及其平方的累加和一次算出所有行的方差。鉴频器
+        输出的频率噪声方差约为 B²/(12·SNR)（B 为解调带宽），据此换算为解调带宽内的信噪比，
+        上限 60 dB。同步脉冲不在已接收音频范围内的行（录音不完整）没有估计值，记为 NaN。
+        """
+        scale = period / (spec['line_ms'] * sample_rate / 1000)
+        sync = spec['sync_ms'] * sample_rate / 1000 * scale
+        begin = np.round(line_starts + 0.2 * sync)
+        end = np.round(line_starts + 0.8 * sync)
+        received = (begin >= 0) & (end <= len(freq)) & (end > begin)
+        begin = np.clip(begin, 0, len(freq)).astype(int)
+        end = np.clip(end, 0, len(freq)).astype(int)
+        count = np.maximum(end - begin, 1)
+        
+        cumulative = np.concatenate([[0.0], np.cumsum(freq)])
+        cumulative_sq = np.concatenate([[0.0], np.cumsum(freq * freq)])
+        mean = (cumulative[end] - cumulative[begin]) / count
+        variance = np.maximum((cumulative_sq[end] - cumulative_sq[begin]) / count - mean ** 2, 0.0)
+        
+        bandwidth_sq = (DEMOD_BAND[1] - DEMOD_BAND[0]) ** 2 / 12.0
+        snr = 10 * np.log10(bandwidth_sq / np.maximum(variance, bandwidth_sq * 1e-6))
+        return np.where(received, snr, np.nan)
+    
+    @staticmethod
+    def smooth_image(img, line_snr):
+        """按行信噪比自适应地做 3x3 中值滤波
+        
+        每行的滤波强度由该行信噪比在 SMOOTH_FULL_DB~SMOOTH_START_DB 之间线性插值得到，
+        图像与中值滤波结果按强度混合；所有行信噪比都足够高时直接返回原图。
+        没有信噪比估计（NaN）的行按其余各行信噪比的中位数处理。
+        """
+        from PIL import Image
+        
+        line_snr = np.asarray(line_snr, dtype=np.float64)
+        known = ~np.isnan(line_snr)
+        if not known.any():
+            return img
+        line_snr = np.where(known, line_snr, np.median(line_snr[known]))
+        weight = np.clip((SMOOTH_START_DB - line_snr) / (SMOOTH_START_DB - SMOOTH_FULL_DB), 0.0, 1.0)
+        if not weight.any():
+            return img
+        
+        pixels = np.asarray(img, dtype=np.float32)
+        # 每个同步行对应一行或两行（PD模式）图像
+        weight = np.repeat(weight, max(1, pixels.shape[0] // len(weight)))
+        weight = np.pad(weight, (0, max(0, pixels.shape[0] - len(weight))), mode='edge')[:pixels.shape[0]]
+        
+        padded = np.pad(pixels, ((1, 1), (1, 1), (0, 0)), mode='edge')
+        windows = sliding_window_view(padded, (3, 3), axis=(0, 1))
+        median = np.median(windows.reshape(pixels.shape + (9,)), axis=-1)
+        blended = pixels + weight[:, None, None] * (median - pixels)
+        return Image.fromarray(np.clip(np.round(blended), 0, 255).astype(np.uint8), 'RGB')
+    
+    @staticmethod
+    def channels_to_image(values, spec):
+        """把各通道像素值（形状为 通道数 x 同步行数 x 宽度）按模式的颜色编码组合成RGB图像"""
+        from PIL import Image
+        
+        values = values.astype(np.uint8)
+        color = spec['color']
+        if color == 'GBR':
+            return Image.fromarray(np.stack([values[2], values[0], values[1]], axis=-1), 'RGB')
+        if color == 'RGB':
+            return Image.fromarray(np.stack([values[0], values[1], values[2]], axis=-1), 'RGB')
+        
+        if color == 'PD':
+            # 每个同步行包含两行图像：Y0、Cr、Cb、Y1
+            luma = np.empty((values.shape[1] * 2, values.shape[2]), dtype=np.uint8)
+            luma[0::2] = values[0]
+            luma[1::2] = values[3]
+            cr = np.repeat(values[1], 2, axis=0)
+            cb = np.repeat(values[2], 2, axis=0)
+        else:
+            # Robot36：偶数行携带Cr，奇数行携带Cb，两行共用
+            luma = values[0]
+            pairs = values.shape[1] // 2
+            cr = np.repeat(values[1][0:pairs * 2:2], 2, axis=0)
+            cb = np.repeat(values[1][1:pairs * 2:2], 2, axis=0)
+            luma = luma[:pairs * 2]
+        ycbcr = np.stack([luma, cb, cr], axis=-1)
+        return Image.fromarray(ycbcr, 'YCbCr').convert('RGB')
+    
+    @staticmethod
+    def detect_audio_mode(audio_path):
+        """只检测音频文件中的SSTV模式，不解码图像"""
+        try:
+            import soundfile as sf
+            from app.decryption.mode_detector import scan_file
+            
+            headers = scan_file(audio_path)
+            if not headers:
+                audio_data, sample_rate = sf.read(audio_path, frames=30 * sf.info(audio_path).samplerate)
+                detection = detect_mode(audio_data, sample_rate)
+                headers = [detection] if detection else []
+            
+            if not headers:
+                return {
+                    "success": False,
+                    "message": "未检测到SSTV信号"
+                }
+            
+            return {
+                "success": True,
+                "mode": headers[0]['mode'],
+                "transmissions": headers
+            }
+        except Exception as e:
+            return {
+                "success": False,
+                "message": f"模式检测出错: {str(e)}"
+            }
+    
     @staticmethod
     def record_and_decode(output_image_path, duration=10):
         """通过麦克风录制音频并解码图像"""
@@ -112,18 +359,8 @@ class SSTVDecoder:
                     'error': '无法录制音频'
                 }
             
-            # 保存临时音频文件
-            temp_audio_path = os.path.join(os.path.dirname(output_image_path), 'temp_recording.wav')
-            sf.write(temp_audio_path, audio_data, sample_rate)
-            
-            # 解码录制的音频
-            result = SSTVDecoder.decode_audio(temp_audio_path, output_image_path)
-            
-            # 删除临时文件
-            if os.path.exists(temp_audio_path):
-                os.remove(temp_audio_path)
-            
-            return result
+            # 直接解码录制的样本（不经过共享的临时文件，并发录音互不干扰）
+            return SSTVDecoder.decode_samples(audio_data, sample_rate, output_image_path)
         except Exception as e:
             print(f"录音解码失败: {e}")
             return {
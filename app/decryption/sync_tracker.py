@@ -0,0 +1,97 @@
+import numpy as np
+from app.decryption.tone_detector import moving_sum, FREQ_SYNC
+
+# 频率与同步音相差多少赫兹以内视为同步
+SYNC_TOLERANCE_HZ = 150
+
+
+def sync_score(freq, sample_rate, sync_ms):
+    """行同步脉冲匹配滤波输出
+
+    先把瞬时频率映射为"像同步音的程度"(0~1)，再与宽度为同步脉冲时长的矩形模板做相关
+    （累加和实现，整段音频一次完成）。输出在同步脉冲起点处取得最大值。
+    """
+    likeness = np.clip(1.0 - np.abs(freq - FREQ_SYNC) / SYNC_TOLERANCE_HZ, 0.0, 1.0)
+    window = max(1, int(round(sync_ms * sample_rate / 1000)))
+    return moving_sum(likeness, window) / window
+
+
+def fit_line_positions(peaks, first_guess, period_guess, count, max_drift=0.01, iterations=4):
+    """对同步脉冲位置做稳健线性回归，得到每行同步脉冲的位置
+
+    位置模型为 position = start + period * k（k 为行号）。每次迭代按当前模型为脉冲
+    分配行号，剔除残差过大的脉冲（误检、噪声）后重新最小二乘拟合。
+
+    Args:
+        peaks: 候选同步脉冲起点（样本序号）
+        first_guess: 第一行同步脉冲位置的初始估计
+        period_guess: 名义行周期（样本数）
+        count: 同步脉冲（行）数量
+        max_drift: 允许的最大采样率偏差（相对值）
+
+    Returns:
+        tuple: (起点, 周期, 参与拟合的脉冲数)
+    """
+    start, period = float(first_guess), float(period_guess)
+    used = 0
+    tolerance = 0.1 * period
+    for _ in range(iterations):
+        index = np.round((peaks - start) / period)
+        valid = (index >= 0) & (index < count)
+        index, candidates = index[valid], peaks[valid]
+        residual = candidates - (start + period * index)
+
+        # 同一行有多个候选时保留残差最小的
+        order = np.argsort(np.abs(residual))
+        _, unique = np.unique(index[order], return_index=True)
+        keep = order[unique]
+        index, candidates, residual = index[keep], candidates[keep], residual[keep]
+
+        if len(residual) < 2:
+            break
+        inliers = np.abs(residual - np.median(residual)) <= tolerance
+        if inliers.sum() < 2:
+            break
+        new_period, new_start = np.polyfit(index[inliers], candidates[inliers], 1)
+        if abs(new_period / period_guess - 1) > max_drift:
+            # 拟合结果不合理时只修正起点
+            new_period = period
+            new_start = float(np.median(candidates[inliers] - period * index[inliers]))
+        start, period, used = float(new_start), float(new_period), int(inliers.sum())
+
+        mad = np.median(np.abs(residual[inliers] - np.median(residual[inliers])))
+        tolerance = max(4 * 1.4826 * mad, 0.002 * period)
+    return start, period, used
+
+
+def track_line_syncs(freq, sample_rate, spec, image_start):
+    """定位图像全部行同步脉冲并估计实际行周期（采样率偏差）
+
+    Args:
+        freq: 瞬时频率序列
+        sample_rate: freq 的采样率
+        spec: 模式参数（见 app.utils.sstv_modes）
+        image_start: 图像数据起点（VIS头之后）的样本序号
+
+    Returns:
+        dict: {'starts': 每行同步脉冲位置数组, 'period': 实测行周期(样本),
+               'drift_ppm': 相对名义周期的偏差, 'matched': 参与拟合的脉冲数}
+    """
+    from scipy.signal import find_peaks
+
+    count = spec['height'] // spec['lines_per_sync']
+    nominal = spec['line_ms'] * sample_rate / 1000
+    first_guess = image_start + spec['sync_lead_ms'] * sample_rate / 1000
+
+    search_from = max(0, int(image_start - 0.05 * nominal))
+    score = sync_score(freq[search_from:], sample_rate, spec['sync_ms'])
+    peaks, _ = find_peaks(score, height=0.5, distance=max(1, int(0.7 * nominal)))
+    peaks = peaks + search_from
+
+    start, period, matched = fit_line_positions(peaks, first_guess, nominal, count)
+    return {
+        'starts': start + period * np.arange(count),
+        'period': period,
+        'drift_ppm': round((period / nominal - 1) * 1e6, 1),
+        'matched': matched
+    }
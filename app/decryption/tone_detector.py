@@ -0,0 +1,149 @@
+from functools import lru_cache
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+# SSTV 信令使用的音调频率 (Hz)
+FREQ_VIS_BIT1 = 1100
+FREQ_SYNC = 1200
+FREQ_VIS_BIT0 = 1300
+FREQ_BLACK = 1500
+FREQ_LEADER = 1900
+FREQ_WHITE = 2300
+
+DETECTOR_FREQS = (FREQ_VIS_BIT1, FREQ_SYNC, FREQ_VIS_BIT0, FREQ_BLACK, FREQ_LEADER, FREQ_WHITE)
+
+
+@lru_cache(maxsize=32)
+def _goertzel_basis(length, freqs, sample_rate):
+    """构造长度为 length 的正弦/余弦基矩阵，形状为 (length, 2 * 频率数)"""
+    n = np.arange(length)[:, None]
+    omega = 2 * np.pi * np.asarray(freqs, dtype=np.float64)[None, :] / sample_rate
+    return np.hstack([np.cos(omega * n), np.sin(omega * n)])
+
+
+def tone_energy(frames, freqs, sample_rate):
+    """计算每一帧中指定频率分量的能量
+
+    与对每帧、每个频率运行一次 Goertzel 滤波器得到的 |X(f)|^2 相同，
+    但以一次矩阵乘法同时完成所有帧和频率的计算。
+
+    Args:
+        frames: 形状为 (帧数, 帧长) 的数组
+        freqs: 频率元组
+        sample_rate: 采样率
+
+    Returns:
+        numpy数组: 形状为 (帧数, 频率数)，单位与帧内样本平方和相同
+    """
+    frames = np.asarray(frames, dtype=np.float64)
+    length = frames.shape[-1]
+    basis = _goertzel_basis(length, tuple(freqs), sample_rate)
+    projected = frames @ basis
+    k = len(freqs)
+    return 2.0 * (projected[..., :k] ** 2 + projected[..., k:] ** 2) / length
+
+
+def moving_sum(values, window):
+    """长度为 window 的前向滑动和（累加和实现，每个样本 O(1)），末尾不足一个窗口的部分按实际长度求和"""
+    window = max(1, min(int(window), len(values)))
+    cumsum = np.concatenate([np.zeros(1, dtype=values.dtype), np.cumsum(values)])
+    result = np.empty(len(values), dtype=values.dtype)
+    result[:len(values) - window + 1] = cumsum[window:] - cumsum[:-window]
+    result[len(values) - window + 1:] = cumsum[-1] - cumsum[len(values) - window + 1:-1]
+    return result
+
+
+def snr_db(tone, total):
+    """根据音调能量和帧总能量估计信噪比 (dB)"""
+    noise = np.maximum(np.asarray(total) - tone, 1e-12)
+    return 10 * np.log10(np.maximum(tone, 1e-12) / noise)
+
+
+class ToneDetector:
+    """流式 SSTV 信令检测器
+
+    以 10 ms 窗、5 ms 步长计算少量音调的 Goertzel 能量：
+    连续的 1900 Hz 引导音后出现 1200 Hz 时报告一次传输开始（VIS 头），
+    并记录最近一次出现行同步脉冲 (1200 Hz) 的位置，用于判断传输结束。
+    每个样本只需少量乘加，空闲监听时 CPU 占用很低。
+    """
+
+    def __init__(self, sample_rate, window_ms=10, hop_ms=5, leader_ms=150,
+                 tone_ratio=0.5, sync_ratio=0.1, min_level=1e-6):
+        self.sample_rate = sample_rate
+        self.window = int(sample_rate * window_ms / 1000)
+        self.hop = int(sample_rate * hop_ms / 1000)
+        self.leader_frames = int(leader_ms / hop_ms)
+        self.tone_ratio = tone_ratio
+        self.sync_ratio = sync_ratio
+        self.min_level = min_level
+
+        self._pending = np.zeros(0, dtype=np.float32)
+        self._pending_start = 0
+        self._leader_run = 0
+        self._leader_gap = 0
+        self._leader_start = None
+        self._leader_snr = []
+        self.last_sync_position = None
+
+    def reset(self):
+        """清除引导音状态（不影响样本位置计数）"""
+        self._leader_run = 0
+        self._leader_gap = 0
+        self._leader_start = None
+        self._leader_snr = []
+
+    def feed(self, samples):
+        """送入一块样本，返回检测到的传输开始事件列表
+
+        事件为字典: {'position': 引导音起点的绝对样本序号, 'snr': 引导音信噪比(dB)}
+        """
+        data = np.concatenate([self._pending, np.asarray(samples, dtype=np.float32)])
+        if len(data) < self.window:
+            self._pending = data
+            return []
+
+        frames = sliding_window_view(data, self.window)[::self.hop]
+        consumed = len(frames) * self.hop
+        frame_starts = self._pending_start + np.arange(len(frames)) * self.hop
+        self._pending = data[consumed:]
+        self._pending_start += consumed
+
+        energy = tone_energy(frames, DETECTOR_FREQS, self.sample_rate)
+        total = np.einsum('ij,ij->i', frames, frames, dtype=np.float64)
+        active = total > self.min_level * self.window
+        share = energy / np.maximum(total, 1e-12)[:, None]
+
+        sync_index = DETECTOR_FREQS.index(FREQ_SYNC)
+        leader_index = DETECTOR_FREQS.index(FREQ_LEADER)
+        is_sync = active & (share[:, sync_index] > self.sync_ratio)
+        is_leader = active & (share[:, leader_index] > self.tone_ratio)
+
+        if is_sync.any():
+            self.last_sync_position = int(frame_starts[np.flatnonzero(is_sync)[-1]])
+
+        detections = []
+        # 只有存在引导音时才逐帧跟踪状态，其余时间仅做上面的向量化计算
+        if not (is_leader.any() or self._leader_run):
+            return detections
+
+        leader_snr = snr_db(energy[:, leader_index], total)
+        for i in range(len(frames)):
+            if is_leader[i]:
+                if self._leader_run == 0:
+                    self._leader_start = int(frame_starts[i])
+                self._leader_run += 1
+                self._leader_gap = 0
+                self._leader_snr.append(leader_snr[i])
+            elif is_sync[i] and self._leader_run >= self.leader_frames:
+                detections.append({
+                    'position': self._leader_start,
+                    'snr': round(float(np.median(self._leader_snr)), 1)
+                })
+                self.reset()
+            elif self._leader_run:
+                # 允许引导音与同步音交界处的少量过渡帧
+                self._leader_gap += 1
+                if self._leader_gap > 2:
+                    self.reset()
+        return detections
@@ -0,0 +1,117 @@
+import os
+import itertools
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+
+# 每个合成块的大致时长（秒）；块在频率片段边界处切分，相当于若干条扫描行
+BLOCK_SECONDS = 2.0
+
+
+def _sample_counts(durations):
+    """按 pysstv gen_values 的方式逐片段累计小数样本数，得到每个片段的整数样本数
+
+    必须与 pysstv 的浮点累加顺序完全一致，否则个别片段边界会相差一个样本并引入相位偏差。
+    这里只对片段（而不是样本）循环，耗时远小于逐样本合成。
+    """
+    counts = []
+    append = counts.append
+    samples = 0.0
+    for duration in durations:
+        samples += duration
+        count = int(samples)
+        append(count)
+        samples -= count
+    return np.array(counts, dtype=np.int64)
+
+
+def build_timeline(instance):
+    """由 pysstv 模式实例的 (频率, 毫秒) 序列计算每个频率片段的样本范围和起始相位
+
+    振荡器相位是频率对时间的积分，片段起始相位即之前所有片段 样本数 x 每样本相位增量 之和，
+    因此任意一段样本都可以独立合成，拼接后相位连续。样本划分和相位累加都与 pysstv 的
+    gen_values 相同，合成结果与逐样本生成一致。
+
+    Returns:
+        dict: {'starts', 'counts', 'steps'(每样本相位增量), 'phases'(起始相位), 'total'(总样本数)}
+    """
+    freq_bits = np.fromiter(itertools.chain.from_iterable(instance.gen_freq_bits()),
+                            dtype=np.float64).reshape(-1, 2)
+    sample_rate = instance.samples_per_sec
+    counts = _sample_counts((sample_rate / 1000 * freq_bits[:, 1]).tolist())
+    ends = np.cumsum(counts)
+    starts = ends - counts
+    steps = freq_bits[:, 0] * (2 * np.pi / sample_rate)
+
+    # pysstv 对没有样本的片段仍按上一个非空片段的样本数累加相位，这里保持一致
+    nonzero = np.where(counts > 0, np.arange(len(counts)), -1)
+    last = np.maximum.accumulate(nonzero)
+    advance = np.where(counts > 0, counts, np.where(last >= 0, counts[np.maximum(last, 0)], 1))
+    phases = np.concatenate([[0.0], np.cumsum(advance * steps)[:-1]])
+    return {
+        'starts': starts,
+        'counts': counts,
+        'steps': steps,
+        'phases': phases,
+        'total': int(ends[-1]) if len(ends) else 0
+    }
+
+
+def split_blocks(timeline, block_samples):
+    """在片段边界处把时间轴切分为若干块，返回 [(起始片段, 结束片段), ...]"""
+    total = timeline['total']
+    count = max(1, int(np.ceil(total / max(1, block_samples))))
+    targets = np.arange(1, count) * total / count
+    bounds = np.searchsorted(timeline['starts'], targets)
+    bounds = np.unique(np.concatenate([[0], bounds, [len(timeline['starts'])]]))
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def synthesize_block(timeline, first, last, bits=16, out=None):
+    """合成片段 [first, last) 的样本，量化方式与 pysstv 的 gen_samples 相同（不含其随机抖动）
+
+    out 为整幅图像的输出数组时直接写入对应位置，否则返回新分配的块数组。
+    NumPy 的数组运算会释放 GIL，多个块可以在线程中并行合成。
+    """
+    counts = timeline['counts'][first:last]
+    begin = int(timeline['starts'][first])
+    end = begin + int(counts.sum())
+    block = out[begin:end] if out is not None else np.empty(end - begin, dtype=np.float32)
+    if end <= begin:
+        return block
+    segment = np.repeat(np.arange(first, last), counts)
+    local = np.arange(begin, end) - timeline['starts'][segment]
+    values = np.sin(local * timeline['steps'][segment] + timeline['phases'][segment])
+
+    amp = 2 ** bits // 2
+    block[:] = np.clip(np.trunc(values * amp), -amp, amp - 1)
+    return block
+
+
+def iter_blocks(instance, block_seconds=BLOCK_SECONDS):
+    """按顺序逐块合成样本，内存占用只与块长度有关（供流式写出使用）"""
+    timeline = build_timeline(instance)
+    for first, last in split_blocks(timeline, int(block_seconds * instance.samples_per_sec)):
+        yield synthesize_block(timeline, first, last, instance.bits)
+
+
+def synthesize(instance, threads=None, block_seconds=BLOCK_SECONDS):
+    """把图像按块切分后在线程池中并行合成，拼接为完整样本数组（与 gen_samples 相比个别样本相差不超过 1）
+
+    Returns:
+        ndarray: float32 样本数组，尚未做 SSTVEncoder.to_pcm 转换
+    """
+    timeline = build_timeline(instance)
+    out = np.empty(timeline['total'], dtype=np.float32)
+    blocks = split_blocks(timeline, int(block_seconds * instance.samples_per_sec))
+    threads = threads or os.cpu_count() or 1
+    if threads <= 1 or len(blocks) == 1:
+        for first, last in blocks:
+            synthesize_block(timeline, first, last, instance.bits, out)
+        return out
+
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        futures = [executor.submit(synthesize_block, timeline, first, last, instance.bits, out)
+                   for first, last in blocks]
+        for future in futures:
+            future.result()
+    return out
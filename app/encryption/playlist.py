@@ -0,0 +1,320 @@
+import os
+import time
+import hashlib
+import tempfile
+import numpy as np
+from app.encryption.sstv_encoder import SSTVEncoder, get_mode_class
+
+# 每次写入文件的样本数，决定合成时的内存占用
+CHUNK_SAMPLES = 65536
+
+# 片段缓存格式版本，改变合成方式时递增使旧缓存失效
+SEGMENT_VERSION = '2'
+
+# 摩尔斯电码表
+MORSE_CODE = {
+    'A': '.-', 'B': '-...', 'C': '-.-.', 'D': '-..', 'E': '.', 'F': '..-.',
+    'G': '--.', 'H': '....', 'I': '..', 'J': '.---', 'K': '-.-', 'L': '.-..',
+    'M': '--', 'N': '-.', 'O': '---', 'P': '.--.', 'Q': '--.-', 'R': '.-.',
+    'S': '...', 'T': '-', 'U': '..-', 'V': '...-', 'W': '.--', 'X': '-..-',
+    'Y': '-.--', 'Z': '--..',
+    '0': '-----', '1': '.----', '2': '..---', '3': '...--', '4': '....-',
+    '5': '.....', '6': '-....', '7': '--...', '8': '---..', '9': '----.',
+    '/': '-..-.', '?': '..--..', '=': '-...-', '.': '.-.-.-', ',': '--..--'
+}
+
+
+def cw_elements(text):
+    """把呼号文本转换为 (是否发音, 单位时长数) 序列（PARIS 标准时序）"""
+    elements = []
+    for word in text.upper().split():
+        if elements:
+            elements.append((False, 7))
+        for i, char in enumerate(word):
+            code = MORSE_CODE.get(char)
+            if code is None:
+                raise ValueError(f"无法用摩尔斯电码发送字符: {char}")
+            if i > 0:
+                elements.append((False, 3))
+            for j, symbol in enumerate(code):
+                if j > 0:
+                    elements.append((False, 1))
+                elements.append((True, 1 if symbol == '.' else 3))
+    return elements
+
+
+def gen_cw_chunks(text, sample_rate=44100, wpm=20, freq=800, amplitude=0.8, ramp_ms=5):
+    """逐个码元生成CW识别音（int16），码元边沿加升余弦包络避免咔嗒声"""
+    unit = int(round(1.2 / wpm * sample_rate))
+    ramp = min(int(sample_rate * ramp_ms / 1000), unit // 2)
+    edge = 0.5 - 0.5 * np.cos(np.pi * np.arange(ramp) / max(ramp, 1))
+    phase = 0.0
+    for keyed, units in cw_elements(text):
+        length = unit * units
+        if not keyed:
+            yield np.zeros(length, dtype=np.int16)
+            continue
+        # 相位在码元间连续
+        tone = np.sin(phase + 2 * np.pi * freq * np.arange(length) / sample_rate)
+        phase += 2 * np.pi * freq * length / sample_rate
+        if ramp:
+            tone[:ramp] *= edge
+            tone[-ramp:] *= edge[::-1]
+        yield (tone * amplitude * 32767).astype(np.int16)
+
+
+def gen_silence_chunks(seconds, sample_rate):
+    """分块生成静音"""
+    remaining = int(round(seconds * sample_rate))
+    while remaining > 0:
+        count = min(remaining, CHUNK_SAMPLES)
+        yield np.zeros(count, dtype=np.int16)
+        remaining -= count
+
+
+def gen_image_chunks(image_path, mode_name, sample_rate=44100, bits=16):
+    """逐块合成单幅图像的SSTV音频，与 SSTVEncoder.encode_image(parallel=True) 输出一致"""
+    from app.encryption.line_parallel import iter_blocks
+
+    mode_class = get_mode_class(mode_name)
+    if not mode_class:
+        raise ValueError(f"不支持的模式: {mode_name}")
+    instance = SSTVEncoder.create_instance(image_path, mode_class, sample_rate, bits)
+    for block in iter_blocks(instance, CHUNK_SAMPLES / sample_rate):
+        yield SSTVEncoder.to_pcm(block, bits)
+
+
+def synthesize_segment(image_path, mode_name, sample_rate, bits, path):
+    """把单幅图像的SSTV音频合成到 path（供工作进程并行预合成片段缓存）"""
+    import soundfile as sf
+
+    written = 0
+    with sf.SoundFile(path, 'w', sample_rate, 1, f"PCM_{bits}", format='WAV') as segment:
+        for chunk in gen_image_chunks(image_path, mode_name, sample_rate, bits):
+            segment.write(chunk)
+            written += len(chunk)
+    return written
+
+
+class SegmentCache:
+    """单幅图像SSTV音频片段缓存
+
+    以"图像内容哈希 + 模式 + 采样率 + 位深"为键，每个片段保存为缓存目录下的一个WAV文件，
+    播放列表中重复出现或再次发送的图像无需重新合成。条目数超过上限时按修改时间淘汰。
+    """
+
+    def __init__(self, cache_folder, max_entries=64):
+        self.cache_folder = cache_folder
+        self.max_entries = max_entries
+        os.makedirs(self.cache_folder, exist_ok=True)
+
+    @staticmethod
+    def make_key(image_path, mode_name, sample_rate, bits):
+        """由图像内容和合成参数生成缓存键"""
+        hasher = hashlib.blake2b(digest_size=32)
+        with open(image_path, 'rb') as f:
+            for block in iter(lambda: f.read(1024 * 1024), b''):
+                hasher.update(block)
+        hasher.update(f"|{mode_name}|{sample_rate}|{bits}|{SEGMENT_VERSION}".encode('utf-8'))
+        return hasher.hexdigest()
+
+    def path(self, key):
+        return os.path.join(self.cache_folder, f"{key}.wav")
+
+    def get(self, key):
+        """返回缓存片段路径，未命中时返回 None"""
+        path = self.path(key)
+        if not os.path.exists(path):
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return path
+
+    def temp_path(self, key):
+        """合成中的片段先写入临时文件，完成后再调用 commit
+
+        每次调用创建一个新的唯一文件，多个线程或进程同时合成同一片段时不会互相覆盖。
+        """
+        fd, path = tempfile.mkstemp(prefix=f"{key}.", suffix='.tmp', dir=self.cache_folder)
+        os.close(fd)
+        return path
+
+    def commit(self, temp_path, key):
+        os.replace(temp_path, self.path(key))
+        self._evict()
+
+    def _evict(self):
+        try:
+            names = [name for name in os.listdir(self.cache_folder) if name.endswith('.wav')]
+        except OSError:
+            return
+        if len(names) <= self.max_entries:
+            return
+
+        entries = []
+        for name in names:
+            path = os.path.join(self.cache_folder, name)
+            try:
+                entries.append((os.path.getmtime(path), path))
+            except OSError:
+                continue
+        entries.sort()
+        for _, path in entries[:len(entries) - self.max_entries]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+class SSTVPlaylist:
+    """多图像SSTV发射序列
+
+    按顺序合成多幅图像（每幅带各自的VIS头），图像之间插入静音和可选的CW呼号识别，
+    一次流式写入同一个输出文件。合成和写入都按块进行，内存占用与序列总长度无关；
+    每幅图像的音频在写入输出的同时写入片段缓存，之后直接从缓存复制。
+
+    同时提供片段缓存和工作进程池时，先在工作进程中并行合成全部未缓存的图像，再顺序写出。
+    """
+
+    def __init__(self, sample_rate=44100, bits=16, gap_seconds=5.0, cw_id=None,
+                 cw_wpm=20, cw_freq=800, cache=None, worker_pool=None):
+        if cw_id:
+            # 尽早拒绝无法用摩尔斯电码发送的呼号，而不是合成到一半才失败
+            cw_elements(cw_id)
+        self.sample_rate = sample_rate
+        self.bits = bits
+        self.gap_seconds = gap_seconds
+        self.cw_id = cw_id
+        self.cw_wpm = cw_wpm
+        self.cw_freq = cw_freq
+        self.cache = cache
+        self.worker_pool = worker_pool
+        self.items = []
+
+    def add(self, image_path, mode_name):
+        """在序列末尾添加一幅图像"""
+        if not get_mode_class(mode_name):
+            raise ValueError(f"不支持的模式: {mode_name}")
+        if not os.path.exists(image_path):
+            raise FileNotFoundError(f"图像文件不存在: {image_path}")
+        self.items.append((image_path, mode_name))
+
+    def _prepare_segments(self):
+        """在工作进程中并行合成缓存中还没有的图像片段"""
+        pending = {}
+        for image_path, mode_name in self.items:
+            key = self.cache.make_key(image_path, mode_name, self.sample_rate, self.bits)
+            if key not in pending and self.cache.get(key) is None:
+                temp_path = self.cache.temp_path(key)
+                pending[key] = (temp_path, self.worker_pool.submit(
+                    synthesize_segment, image_path, mode_name, self.sample_rate, self.bits, temp_path))
+
+        for key, (temp_path, future) in pending.items():
+            try:
+                future.result()
+                self.cache.commit(temp_path, key)
+            except Exception as e:
+                # 失败的片段在写出时会在本进程内重新合成
+                print(f"并行合成片段失败: {e}")
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+
+    def _write_image(self, out, image_path, mode_name):
+        """写入一幅图像的音频，返回 (样本数, 是否命中缓存)"""
+        import soundfile as sf
+
+        written = 0
+        if self.cache is None:
+            for chunk in gen_image_chunks(image_path, mode_name, self.sample_rate, self.bits):
+                out.write(chunk)
+                written += len(chunk)
+            return written, False
+
+        key = self.cache.make_key(image_path, mode_name, self.sample_rate, self.bits)
+        cached = self.cache.get(key)
+        if cached:
+            for block in sf.blocks(cached, blocksize=CHUNK_SAMPLES, dtype='int16'):
+                out.write(block)
+                written += len(block)
+            return written, True
+
+        temp_path = self.cache.temp_path(key)
+        try:
+            with sf.SoundFile(temp_path, 'w', self.sample_rate, 1, f"PCM_{self.bits}",
+                              format='WAV') as segment:
+                for chunk in gen_image_chunks(image_path, mode_name, self.sample_rate, self.bits):
+                    out.write(chunk)
+                    segment.write(chunk)
+                    written += len(chunk)
+            self.cache.commit(temp_path, key)
+        except Exception:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        return written, False
+
+    def _write_chunks(self, out, chunks):
+        written = 0
+        for chunk in chunks:
+            out.write(chunk)
+            written += len(chunk)
+        return written
+
+    def write(self, output_path):
+        """合成整个序列并写入 output_path
+
+        Returns:
+            dict: 输出路径、总时长以及每幅图像在输出中的起止时间
+        """
+        if not self.items:
+            raise ValueError("播放列表为空")
+
+        os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+        started = time.perf_counter()
+        if self.cache is not None and self.worker_pool is not None:
+            self._prepare_segments()
+        try:
+            position, entries = self._write_all(output_path)
+        except BaseException:
+            # 不留下不完整的输出文件
+            if os.path.exists(output_path):
+                os.remove(output_path)
+            raise
+
+        return {
+            'output_path': output_path,
+            'duration': round(position / self.sample_rate, 3),
+            'items': entries,
+            'elapsed_seconds': round(time.perf_counter() - started, 3)
+        }
+
+    def _write_all(self, output_path):
+        """按顺序写出全部图像、静音和CW识别音，返回 (总样本数, 每幅图像的信息)"""
+        import soundfile as sf
+
+        position = 0
+        entries = []
+        with sf.SoundFile(output_path, 'w', self.sample_rate, 1, f"PCM_{self.bits}") as out:
+            for index, (image_path, mode_name) in enumerate(self.items):
+                if index > 0:
+                    position += self._write_chunks(
+                        out, gen_silence_chunks(self.gap_seconds, self.sample_rate))
+
+                print(f"正在使用{mode_name}模式合成第{index + 1}/{len(self.items)}幅图像...")
+                count, cached = self._write_image(out, image_path, mode_name)
+                entries.append({
+                    'image_path': image_path,
+                    'mode': mode_name,
+                    'start': round(position / self.sample_rate, 3),
+                    'duration': round(count / self.sample_rate, 3),
+                    'cached': cached
+                })
+                position += count
+
+                if self.cw_id:
+                    position += self._write_chunks(out, gen_silence_chunks(0.5, self.sample_rate))
+                    position += self._write_chunks(out, gen_cw_chunks(
+                        self.cw_id, self.sample_rate, self.cw_wpm, self.cw_freq))
+        return position, entries
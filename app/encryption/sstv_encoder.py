@@ -1,30 +1,38 @@
 import os
-import numpy as np
-from PIL import Image
-import soundfile as sf
-from pysstv import color
+from app.utils.sstv_modes import MODE_SPECS
 
-# 支持的SSTV模式列表
+# 支持的SSTV模式列表：(模式名称, pysstv.color 中的模式类或类名)
+# 使用类名时模式类在首次编码时才导入，应用启动时无需加载 pysstv
 SUPPORTED_MODES = [
-    ('MartinM1', color.MartinM1),
-    ('MartinM2', color.MartinM2),
-    ('ScottieS1', color.ScottieS1),
-    ('ScottieS2', color.ScottieS2),
-    ('ScottieDX', color.ScottieDX),
-    ('Robot36', color.Robot36),
-    ('PasokonP3', color.PasokonP3),
-    ('PasokonP5', color.PasokonP5),
-    ('PasokonP7', color.PasokonP7),
-    ('PD90', color.PD90),
-    ('PD120', color.PD120),
-    ('PD160', color.PD160),
-    ('PD180', color.PD180),
-    ('PD240', color.PD240),
-    ('PD290', color.PD290),
-    ('WraaseSC2120', color.WraaseSC2120),
-    ('WraaseSC2180', color.WraaseSC2180)
+    ('MartinM1', 'MartinM1'),
+    ('MartinM2', 'MartinM2'),
+    ('ScottieS1', 'ScottieS1'),
+    ('ScottieS2', 'ScottieS2'),
+    ('ScottieDX', 'ScottieDX'),
+    ('Robot36', 'Robot36'),
+    ('PasokonP3', 'PasokonP3'),
+    ('PasokonP5', 'PasokonP5'),
+    ('PasokonP7', 'PasokonP7'),
+    ('PD90', 'PD90'),
+    ('PD120', 'PD120'),
+    ('PD160', 'PD160'),
+    ('PD180', 'PD180'),
+    ('PD240', 'PD240'),
+    ('PD290', 'PD290'),
+    ('WraaseSC2120', 'WraaseSC2120'),
+    ('WraaseSC2180', 'WraaseSC2180')
 ]
 
+def get_mode_class(mode_name):
+    """按模式名称获取 pysstv 模式类，不支持的模式返回 None"""
+    for name, mode_class in SUPPORTED_MODES:
+        if name == mode_name:
+            if isinstance(mode_class, str):
+                from pysstv import color
+                mode_class = getattr(color, mode_class)
+            return mode_class
+    return None
+
 class SSTVEncoder:
     """SSTV编码器类"""
     
@@ -32,9 +40,14 @@ class SSTVEncoder:
     def get_supported_modes():
         """获取所有支持的SSTV模式"""
         modes_info = []
-        for mode_name, mode_class in SUPPORTED_MODES:
+        for mode_name, _ in SUPPORTED_MODES:
             try:
-                width, height, vis_code = SSTVEncoder.get_mode_info(mode_class)
+                spec = MODE_SPECS.get(mode_name)
+                if spec:
+                    # 直接使用预先计算的模式参数表，无需实例化模式类
+                    width, height, vis_code = spec['width'], spec['height'], spec['vis_code']
+                else:
+                    width, height, vis_code = SSTVEncoder.get_mode_info(get_mode_class(mode_name))
                 modes_info.append({
                     'name': mode_name,
                     'width': width,
@@ -48,6 +61,12 @@ class SSTVEncoder:
     @staticmethod
     def get_mode_info(mode_class):
         """获取SSTV模式信息"""
+        spec = MODE_SPECS.get(getattr(mode_class, '__name__', None))
+        if spec:
+            return spec['width'], spec['height'], spec['vis_code']
+        
+        from PIL import Image
+        
         # 创建临时空白图像用于获取模式信息
         temp_img = Image.new('RGB', (10, 10), color='black')
         # 使用位置参数实例化，避免关键字参数不兼容问题
@@ -62,6 +81,8 @@ class SSTVEncoder:
     @staticmethod
     def recommend_mode(image_path):
         """根据图像特征推荐合适的SSTV模式"""
+        from PIL import Image
+        
         try:
             with Image.open(image_path) as img:
                 width, height = img.size
@@ -83,76 +104,134 @@ class SSTVEncoder:
     @staticmethod
     def resize_image(img, target_width, target_height):
         """调整图片尺寸"""
+        from PIL import Image
+        
         return img.resize((target_width, target_height), Image.Resampling.LANCZOS)
     
     @staticmethod
-    def encode_image(image_path, output_path, mode_name, sample_rate=44100, bits=16):
-        """将图像编码为SSTV音频"""
+    def create_instance(image_path, mode_class, sample_rate=44100, bits=16):
+        """读取图片、调整到模式要求的尺寸并创建 pysstv 模式实例"""
+        from PIL import Image
+        
+        with Image.open(image_path) as img:
+            # 确保转换为RGB模式
+            img_rgb = img.convert("RGB")
+            
+            # 目标尺寸直接取模式类属性
+            target_w = getattr(mode_class, "WIDTH", 320)
+            target_h = getattr(mode_class, "HEIGHT", 240)
+            
+            # 调整图片尺寸
+            resized_img = SSTVEncoder.resize_image(img_rgb, target_w, target_h)
+        
+        # 使用调整后的图片创建最终实例
+        return mode_class(resized_img, sample_rate, bits)
+    
+    @staticmethod
+    def to_pcm(audio_data, bits=16):
+        """把 gen_samples 生成的样本转换为写入文件的 int16 数组
+        
+        gen_samples（以及 line_parallel.synthesize）输出的已经是 ±2^(bits-1) 范围内的整数样本，
+        这里只换算到 int16 满量程，不能再乘以 32767，否则正弦波会被削成方波。
+        """
+        import numpy as np
+        
+        audio_data = np.asarray(audio_data, dtype=np.float32)
+        scale = 32768 / (2 ** bits // 2)
+        return np.clip(np.round(audio_data * scale), -32768, 32767).astype(np.int16)
+    
+    @staticmethod
+    def encode_image(image_path, output_path, mode_name, sample_rate=44100, bits=16,
+                     parallel=False, threads=None):
+        """将图像编码为SSTV音频
+        
+        parallel 为 True 时按块并行合成（见 app/encryption/line_parallel.py），输出与逐样本
+        生成一致（个别样本相差不超过 1 LSB）；threads 为线程数，默认等于 CPU 核数。
+        """
         try:
             # 查找对应的模式类
-            mode_class = None
-            for name, cls in SUPPORTED_MODES:
-                if name == mode_name:
-                    mode_class = cls
-                    break
+            mode_class = get_mode_class(mode_name)
             
             if not mode_class:
                 raise ValueError(f"不支持的模式: {mode_name}")
             
+            import numpy as np
+            import soundfile as sf
+            
             # 处理图片
-            with Image.open(image_path) as img:
-                # 确保转换为RGB模式
-                img_rgb = img.convert("RGB")
-                
-                # 创建临时实例获取目标尺寸
-                temp_instance = mode_class(img_rgb, sample_rate, bits)
-                target_w = getattr(temp_instance, "WIDTH", 320)
-                target_h = getattr(temp_instance, "HEIGHT", 240)
-                
-                # 调整图片尺寸
-                resized_img = SSTVEncoder.resize_image(img_rgb, target_w, target_h)
-                
-                # 使用调整后的图片创建最终实例
-                instance = mode_class(resized_img, sample_rate, bits)
-                
-                # 生成音频数据
-                print(f"正在使用{mode_name}模式生成SSTV音频...")
+            instance = SSTVEncoder.create_instance(image_path, mode_class, sample_rate, bits)
+            
+            # 生成音频数据
+            print(f"正在使用{mode_name}模式生成SSTV音频...")
+            if parallel:
+                from app.encryption.line_parallel import synthesize
+                audio_data = synthesize(instance, threads)
+            else:
                 audio_data = instance.gen_samples()
-                
-                # 处理生成器类型的结果
-                if hasattr(audio_data, '__iter__') and not isinstance(audio_data, (list, np.ndarray)):
-                    print("正在处理音频生成器...")
-                    audio_data = list(audio_data)
-                
-                # 格式转换
-                if isinstance(audio_data, list):
-                    audio_data = np.array(audio_data, dtype=np.float32)
-                
-                # 确保数据类型正确
-                if audio_data.dtype != np.float32:
-                    audio_data = audio_data.astype(np.float32)
-                
-                # 归一化和裁剪
-                audio_data = np.clip(audio_data * 32767, -32768, 32767).astype(np.int16)
-                
-                # 确保输出目录存在
-                os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
-                
-                # 保存音频
-                sf.write(output_path, audio_data, sample_rate, subtype=f"PCM_{bits}")
-                print(f"音频生成成功，路径：{output_path}")
-                
-                return {
-                    'success': True,
-                    'output_path': output_path,
-                    'mode': mode_name,
-                    'sample_rate': sample_rate,
-                    'bits': bits
-                }
+            
+            # 处理生成器类型的结果
+            if hasattr(audio_data, '__iter__') and not isinstance(audio_data, (list, np.ndarray)):
+                print("正在处理音频生成器...")
+                audio_data = list(audio_data)
+            
+            # 格式转换
+            audio_data = SSTVEncoder.to_pcm(audio_data, bits)
+            
+            # 确保输出目录存在
+            os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+            
+            # 保存音频
+            sf.write(output_path, audio_data, sample_rate, subtype=f"PCM_{bits}")
+            print(f"音频生成成功，路径：{output_path}")
+            
+            return {
+                'success': True,
+                'output_path': output_path,
+                'mode': mode_name,
+                'sample_rate': sample_rate,
+                'bits': bits
+            }
                 
         except Exception as e:
             print(f"编码失败: {e}")
             return {
                 'success': False,
                 'error': str(e)
-            }
\ No newline at end of file
+            }
+
+    @staticmethod
+    def encode_playlist(items, output_path, sample_rate=44100, bits=16, gap_seconds=5.0,
+                        cw_id=None, cache_folder=None, cache_size=64, worker_pool=None):
+        """将多幅图像按顺序编码为一个SSTV音频文件
+        
+        Args:
+            items: [(图像路径, 模式名称), ...]
+            gap_seconds: 相邻图像之间的静音时长
+            cw_id: 每幅图像之后发送的CW呼号，为空时不发送
+            cache_folder: 单幅图像音频片段的缓存目录，为空时不缓存
+            worker_pool: 共享内存工作进程池（app.utils.worker_pool），提供时并行合成各图像
+        """
+        try:
+            from app.encryption.playlist import SSTVPlaylist, SegmentCache
+            
+            cache = SegmentCache(cache_folder, cache_size) if cache_folder else None
+            playlist = SSTVPlaylist(sample_rate, bits, gap_seconds, cw_id, cache=cache,
+                                    worker_pool=worker_pool)
+            for image_path, mode_name in items:
+                playlist.add(image_path, mode_name)
+            
+            result = playlist.write(output_path)
+            print(f"播放列表音频生成成功，路径：{output_path}")
+            result.update({
+                'success': True,
+                'sample_rate': sample_rate,
+                'bits': bits
+            })
+            return result
+        
+        except Exception as e:
+            print(f"播放列表编码失败: {e}")
+            return {
+                'success': False,
+                'error': str(e)
+            }
@@ -0,0 +1,200 @@
+from flask import Blueprint, request, jsonify, current_app
+import os
+import threading
+
+try:
+    import fcntl
+except ImportError:  # Windows 没有 fcntl，不做跨进程检查
+    fcntl = None
+
+# 创建蓝图
+capture_bp = Blueprint('capture', __name__)
+
+# 进程内唯一的采集服务（独占输入设备）
+#
+# 服务及其缓冲区、事件都只存在于启动它的进程中，因此启用采集时应用必须以单个工作进程运行
+# （gunicorn.conf.py 在 SSTV_CAPTURE_ENABLED=1 时强制 workers=1）。另外用数据目录下的
+# 文件锁保证同一时刻只有一个进程打开设备，其他进程收到的请求返回明确的错误。
+_capture_service = None
+_capture_lock = threading.Lock()
+_device_lock_file = None
+
+# 长轮询最长等待时间（秒）
+MAX_POLL_TIMEOUT = 30
+
+DEVICE_LOCK_NAME = 'capture.lock'
+
+
+def _device_lock_path():
+    return os.path.join(current_app.config['DATA_FOLDER'], DEVICE_LOCK_NAME)
+
+
+def _acquire_device():
+    """获取跨进程的设备锁，已被其他进程持有时返回 False"""
+    global _device_lock_file
+    if fcntl is None or _device_lock_file is not None:
+        return True
+    lock_file = open(_device_lock_path(), 'a+')
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        lock_file.close()
+        return False
+    lock_file.seek(0)
+    lock_file.truncate()
+    lock_file.write(str(os.getpid()))
+    lock_file.flush()
+    _device_lock_file = lock_file
+    return True
+
+
+def _release_device():
+    global _device_lock_file
+    if _device_lock_file is not None:
+        fcntl.flock(_device_lock_file, fcntl.LOCK_UN)
+        _device_lock_file.close()
+        _device_lock_file = None
+
+
+def device_owner():
+    """设备被其他进程中的采集服务占用时返回该进程的 PID，否则返回 None"""
+    if fcntl is None or _device_lock_file is not None:
+        return None
+    try:
+        lock_file = open(_device_lock_path())
+    except OSError:
+        return None
+    with lock_file:
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_SH | fcntl.LOCK_NB)
+        except OSError:
+            return lock_file.read().strip() or '未知'
+        fcntl.flock(lock_file, fcntl.LOCK_UN)
+    return None
+
+
+def _not_running_error():
+    owner = device_owner()
+    if owner:
+        return f'音频采集服务运行在另一个工作进程（PID {owner}）中，启用采集时应用必须以单个工作进程运行'
+    return '音频采集服务未启动'
+
+
+def get_capture_service(create=False):
+    """获取采集服务实例，create 为 True 时按当前应用配置创建"""
+    global _capture_service
+    with _capture_lock:
+        if _capture_service is None and create:
+            from app.decryption.audio_capture import create_capture_service
+            _capture_service = create_capture_service(current_app.config)
+        return _capture_service
+
+
+@capture_bp.route('/start', methods=['POST'])
+def start_capture():
+    """启动后台音频采集"""
+    try:
+        if not current_app.config.get('CAPTURE_ENABLED'):
+            return jsonify({
+                'success': False,
+                'error': '音频采集服务未启用（需设置 SSTV_CAPTURE_ENABLED=1，并以单个工作进程运行）'
+            })
+        if not _acquire_device():
+            return jsonify({
+                'success': False,
+                'error': _not_running_error()
+            })
+
+        service = get_capture_service(create=True)
+        try:
+            service.start()
+        except Exception:
+            _release_device()
+            raise
+        return jsonify({
+            'success': True,
+            'status': service.status()
+        })
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        })
+
+
+@capture_bp.route('/stop', methods=['POST'])
+def stop_capture():
+    """停止后台音频采集"""
+    try:
+        service = get_capture_service()
+        if service is not None:
+            service.stop()
+        _release_device()
+        return jsonify({
+            'success': True,
+            'status': service.status() if service else {'running': False}
+        })
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        })
+
+
+@capture_bp.route('/status', methods=['GET'])
+def capture_status():
+    """获取采集服务状态"""
+    service = get_capture_service()
+    if (service is None or not service.running) and device_owner():
+        return jsonify({
+            'success': False,
+            'error': _not_running_error()
+        })
+    return jsonify({
+        'success': True,
+        'status': service.status() if service else {'running': False}
+    })
+
+
+@capture_bp.route('/record', methods=['POST'])
+def schedule_recording():
+    """登记一个录制解码任务，立即返回任务ID，结果通过事件接口获取"""
+    try:
+        service = get_capture_service()
+        if service is None or not service.running:
+            return jsonify({
+                'success': False,
+                'error': _not_running_error()
+            })
+
+        duration = request.form.get('duration', 10, type=int)
+        job_id = service.schedule_recording(duration)
+        return jsonify({
+            'success': True,
+            'job_id': job_id
+        })
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        })
+
+
+@capture_bp.route('/events', methods=['GET'])
+def get_events():
+    """长轮询获取解码图像等事件"""
+    service = get_capture_service()
+    if service is None:
+        return jsonify({
+            'success': False,
+            'error': _not_running_error()
+        })
+
+    since = request.args.get('since', 0, type=int)
+    timeout = min(request.args.get('timeout', 0, type=float), MAX_POLL_TIMEOUT)
+    events = service.get_events(since, timeout)
+    return jsonify({
+        'success': True,
+        'events': events,
+        'last_id': events[-1]['id'] if events else since
+    })
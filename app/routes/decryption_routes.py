@@ -1,10 +1,12 @@
-from flask import Blueprint, request, jsonify, redirect, url_for, send_from_directory
+from flask import Blueprint, request, jsonify, redirect, url_for, send_from_directory, current_app
 import os
+import tempfile
 from datetime import datetime
 from werkzeug.utils import secure_filename
-from app.decryption.sstv_decoder import SSTVDecoder
 from app.config import Config
 from app.utils.file_manager import FileManager
+from app.utils.decode_cache import DecodeCache
+from app.routes.capture_routes import get_capture_service, device_owner
 
 # 创建蓝图
 decryption_bp = Blueprint('decryption', __name__)
@@ -13,6 +15,10 @@ decryption_bp = Blueprint('decryption', __name__)
 def decode_audio():
     """解码音频文件"""
     try:
+        # 解码器依赖 numpy/scipy，首次请求时才导入以加快应用启动
+        from app.decryption.sstv_decoder import SSTVDecoder
+        from app.utils.worker_pool import get_worker_pool
+        
         # 检查是否有文件上传
         if 'audio_file' not in request.files:
             return jsonify({
@@ -33,20 +39,45 @@ def decode_audio():
         name, ext = os.path.splitext(filename)
         audio_filename = f"{name}-{timestamp}{ext}"
         audio_path = os.path.join(Config.UPLOAD_FOLDER, audio_filename)
-        file.save(audio_path)
+        content_hash = FileManager.save_with_hash(file, audio_path)
+        
+        # 相同内容的音频已解码过时直接返回之前的图像
+        cache = DecodeCache(Config.DECODE_CACHE_FOLDER, Config.DATA_FOLDER, Config.DECODE_CACHE_SIZE)
+        cache_key = DecodeCache.make_key(content_hash, SSTVDecoder.VERSION)
+        cached = cache.get(cache_key)
+        if cached:
+            return jsonify({
+                'success': True,
+                'image_url': url_for('files.download_file', filename=cached['image_path'], folder='data'),
+                'mode': cached['mode'],
+                'snr': cached.get('snr'),
+                'partial': cached.get('partial', False),
+                'lines_received': cached.get('lines_received'),
+                'image_path': cached['image_path'],
+                'cached': True
+            })
         
         # 生成输出图像路径
         image_filename = f"decoded-{name}-{timestamp}.jpg"
         image_path = os.path.join(Config.DATA_FOLDER, image_filename)
         
-        # 解码音频
-        result = SSTVDecoder.decode_audio(audio_path, image_path)
+        # 解码音频（配置了工作进程池时在工作进程中执行，不占用本进程的 GIL）
+        pool = get_worker_pool(current_app.config)
+        if pool is not None:
+            result = pool.submit(SSTVDecoder.decode_audio, audio_path, image_path).result()
+        else:
+            result = SSTVDecoder.decode_audio(audio_path, image_path)
         
         if result['success']:
+            cache.put(cache_key, image_filename, result['mode'], snr=result['snr'],
+                      partial=result['partial'], lines_received=result['lines_received'])
             return jsonify({
                 'success': True,
                 'image_url': url_for('files.download_file', filename=image_filename, folder='data'),
                 'mode': result['mode'],
+                'snr': result['snr'],
+                'partial': result['partial'],
+                'lines_received': result['lines_received'],
                 'image_path': image_filename
             })
         else:
@@ -62,6 +93,9 @@ def decode_audio():
 def record_and_decode():
     """录音并解码"""
     try:
+        from app.decryption.sstv_decoder import SSTVDecoder
+        from app.utils.worker_pool import get_worker_pool
+        
         # 获取录音时长
         duration = request.form.get('duration', 10, type=int)
         
@@ -70,14 +104,36 @@ def record_and_decode():
         image_filename = f"decoded-mic-{timestamp}.jpg"
         image_path = os.path.join(Config.DATA_FOLDER, image_filename)
         
-        # 录音并解码
-        result = SSTVDecoder.record_and_decode(image_path, duration)
+        # 采集服务运行时直接从其缓冲区取音频，不再在请求内独占声卡
+        service = get_capture_service()
+        if service is not None and service.running:
+            audio_data = service.record(duration)
+            pool = get_worker_pool(current_app.config)
+            if pool is not None:
+                # 音频经共享内存传给工作进程
+                result = pool.submit(SSTVDecoder.decode_samples, audio_data, service.sample_rate,
+                                     image_path).result()
+            else:
+                result = SSTVDecoder.decode_samples(audio_data, service.sample_rate, image_path)
+        else:
+            # 声卡由另一个工作进程中的采集服务独占时不能再打开
+            owner = device_owner()
+            if owner:
+                return jsonify({
+                    'success': False,
+                    'error': f'声卡正被工作进程 {owner} 中的音频采集服务使用'
+                })
+            # 录音并解码
+            result = SSTVDecoder.record_and_decode(image_path, duration)
         
         if result['success']:
             return jsonify({
                 'success': True,
                 'image_url': url_for('files.download_file', filename=image_filename, folder='data'),
                 'mode': result['mode'],
+                'snr': result.get('snr'),
+                'partial': result.get('partial', False),
+                'lines_received': result.get('lines_received'),
                 'image_path': image_filename
             })
         else:
@@ -87,4 +143,49 @@ def record_and_decode():
         return jsonify({
             'success': False,
             'error': str(e)
-        })
\ No newline at end of file
+        })
+
+@decryption_bp.route('/detect_mode', methods=['POST'])
+def detect_mode():
+    """只检测音频文件中的SSTV模式（VIS头），不解码图像"""
+    try:
+        from app.decryption.sstv_decoder import SSTVDecoder
+        
+        if 'audio_file' not in request.files:
+            return jsonify({
+                'success': False,
+                'error': '请选择音频文件'
+            })
+        
+        file = request.files['audio_file']
+        if file.filename == '':
+            return jsonify({
+                'success': False,
+                'error': '请选择有效的音频文件'
+            })
+        
+        # 临时保存文件以分析（文件名唯一，同名文件的并发请求不会互相覆盖或删除）
+        ext = os.path.splitext(secure_filename(file.filename))[1]
+        with tempfile.NamedTemporaryFile(dir=Config.UPLOAD_FOLDER, prefix='temp_', suffix=ext,
+                                         delete=False) as temp_file:
+            temp_audio_path = temp_file.name
+            file.save(temp_file)
+        try:
+            result = SSTVDecoder.detect_audio_mode(temp_audio_path)
+        finally:
+            # 删除临时文件
+            if os.path.exists(temp_audio_path):
+                os.remove(temp_audio_path)
+        
+        if not result['success']:
+            return jsonify({
+                'success': False,
+                'error': result['message']
+            })
+        return jsonify(result)
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        })
@@ -1,4 +1,4 @@
-from flask import Blueprint, request, jsonify, redirect, url_for
+from flask import Blueprint, request, jsonify, redirect, url_for, current_app
 import os
 from datetime import datetime
 from werkzeug.utils import secure_filename
@@ -42,7 +42,9 @@ def encode_image():
         audio_path = os.path.join(Config.DATA_FOLDER, audio_filename)
         
         # 加密图像为音频
-        result = SSTVEncoder.encode_image(image_path, audio_path, mode_name)
+        result = SSTVEncoder.encode_image(image_path, audio_path, mode_name,
+                                          parallel=Config.ENCODER_PARALLEL,
+                                          threads=Config.ENCODER_THREADS or None)
         
         if result['success']:
             return jsonify({
@@ -61,6 +63,73 @@ def encode_image():
             'error': str(e)
         })
 
+@encryption_bp.route('/encode_playlist', methods=['POST'])
+def encode_playlist():
+    """把多幅图像按顺序加密为一个音频文件（图像之间插入静音和可选的CW呼号）"""
+    try:
+        from app.utils.worker_pool import get_worker_pool
+        
+        files = [f for f in request.files.getlist('image_files') if f.filename]
+        if not files:
+            return jsonify({
+                'success': False,
+                'error': '请选择图像文件'
+            })
+        
+        # 每幅图像一个模式；只给出一个模式时所有图像共用
+        modes = request.form.getlist('modes') or ['MartinM1']
+        if len(modes) == 1:
+            modes = modes * len(files)
+        if len(modes) != len(files):
+            return jsonify({
+                'success': False,
+                'error': '模式数量与图像数量不一致'
+            })
+        
+        gap_seconds = request.form.get('gap', 5.0, type=float)
+        cw_id = request.form.get('cw_id') or None
+        
+        # 保存上传的文件
+        timestamp = datetime.now().strftime('%Y-%m-%d-%H-%M-%S')
+        items = []
+        image_filenames = []
+        for index, (file, mode_name) in enumerate(zip(files, modes)):
+            name, ext = os.path.splitext(secure_filename(file.filename))
+            image_filename = f"{name}-{timestamp}-{index + 1}{ext}"
+            image_path = os.path.join(Config.UPLOAD_FOLDER, image_filename)
+            file.save(image_path)
+            items.append((image_path, mode_name))
+            image_filenames.append(image_filename)
+        
+        # 生成输出音频路径
+        audio_filename = f"playlist-{timestamp}.wav"
+        audio_path = os.path.join(Config.DATA_FOLDER, audio_filename)
+        
+        result = SSTVEncoder.encode_playlist(items, audio_path,
+                                             gap_seconds=gap_seconds,
+                                             cw_id=cw_id,
+                                             cache_folder=Config.SEGMENT_CACHE_FOLDER,
+                                             cache_size=Config.SEGMENT_CACHE_SIZE,
+                                             worker_pool=get_worker_pool(current_app.config))
+        
+        if result['success']:
+            return jsonify({
+                'success': True,
+                'audio_url': url_for('files.download_file', folder='data', filename=audio_filename),
+                'audio_path': audio_filename,
+                'duration': result['duration'],
+                'items': [dict(item, image_path=filename)
+                          for item, filename in zip(result['items'], image_filenames)]
+            })
+        else:
+            return jsonify(result)
+            
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        })
+
 @encryption_bp.route('/get_modes', methods=['GET'])
 def get_modes():
     """获取所有支持的SSTV模式"""
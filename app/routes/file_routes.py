@@ -1,7 +1,21 @@
-from flask import Blueprint
+from flask import Blueprint, abort, send_from_directory
+from app.config import Config
 
-# 文件管理功能已完全移除
-from flask import Blueprint
+# 文件管理功能已完全移除，仅保留生成文件的下载
+# 创建蓝图
+file_bp = Blueprint('files', __name__)
 
-# 创建蓝图（保留但不使用）
-file_bp = Blueprint('files', __name__)
\ No newline at end of file
+# 允许下载的目录
+DOWNLOAD_FOLDERS = {
+    'data': Config.DATA_FOLDER,
+    'archive': Config.ARCHIVE_FOLDER,
+    'uploads': Config.UPLOAD_FOLDER
+}
+
+@file_bp.route('/download/<folder>/<path:filename>')
+def download_file(folder, filename):
+    """下载编码/解码生成的文件"""
+    directory = DOWNLOAD_FOLDERS.get(folder)
+    if directory is None:
+        abort(404)
+    return send_from_directory(directory, filename)
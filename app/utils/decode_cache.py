@@ -0,0 +1,90 @@
+import os
+import json
+import hashlib
+import tempfile
+import time
+
+
+class DecodeCache:
+    """解码结果缓存
+
+    以"音频内容哈希 + 解码器版本 + 解码选项"为键，记录已解码图像的文件名和模式。
+    每个条目是缓存目录下的一个 JSON 文件，多个工作进程可以共享；命中时更新文件
+    修改时间，条目数超过上限时按修改时间淘汰最久未用的条目（只删除缓存记录，
+    不删除图像文件）。
+    """
+
+    def __init__(self, cache_folder, image_folder, max_entries=256):
+        self.cache_folder = cache_folder
+        self.image_folder = image_folder
+        self.max_entries = max_entries
+        os.makedirs(self.cache_folder, exist_ok=True)
+
+    @staticmethod
+    def make_key(content_hash, version, options=None):
+        """由内容哈希、解码器版本和解码选项生成缓存键"""
+        payload = json.dumps([content_hash, version, options or {}], sort_keys=True)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def _entry_path(self, key):
+        return os.path.join(self.cache_folder, f"{key}.json")
+
+    def get(self, key):
+        """查找缓存，图像文件已不存在时视为未命中"""
+        path = self._entry_path(key)
+        try:
+            with open(path, encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        if not os.path.exists(os.path.join(self.image_folder, entry['image_path'])):
+            self._remove(path)
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return entry
+
+    def put(self, key, image_path, mode, **extra):
+        """登记一次解码结果"""
+        entry = dict(extra, image_path=image_path, mode=mode, created_at=time.time())
+        path = self._entry_path(key)
+        # 临时文件名唯一，同一进程内的多个线程同时写入同一条目也不会互相覆盖
+        fd, temp_path = tempfile.mkstemp(suffix='.tmp', dir=self.cache_folder)
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(entry, f, ensure_ascii=False)
+            os.replace(temp_path, path)
+        except BaseException:
+            self._remove(temp_path)
+            raise
+        self._evict()
+        return entry
+
+    def _evict(self):
+        try:
+            names = [name for name in os.listdir(self.cache_folder) if name.endswith('.json')]
+        except OSError:
+            return
+        if len(names) <= self.max_entries:
+            return
+
+        entries = []
+        for name in names:
+            path = os.path.join(self.cache_folder, name)
+            try:
+                entries.append((os.path.getmtime(path), path))
+            except OSError:
+                continue
+        entries.sort()
+        for _, path in entries[:len(entries) - self.max_entries]:
+            self._remove(path)
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
@@ -1,4 +1,5 @@
 import os
+import hashlib
 import shutil
 import time
 from datetime import datetime
@@ -6,6 +7,24 @@ from datetime import datetime
 class FileManager:
     """文件管理类"""
     
+    @staticmethod
+    def save_with_hash(file_storage, file_path, chunk_size=1024 * 1024):
+        """边保存上传文件边计算内容哈希，只读取一遍数据
+        
+        Returns:
+            str: 文件内容的 BLAKE2b 哈希（十六进制）
+        """
+        hasher = hashlib.blake2b(digest_size=32)
+        stream = file_storage.stream
+        with open(file_path, 'wb') as f:
+            while True:
+                chunk = stream.read(chunk_size)
+                if not chunk:
+                    break
+                hasher.update(chunk)
+                f.write(chunk)
+        return hasher.hexdigest()
+    
     @staticmethod
     def get_file_info(file_path):
         """获取文件基本信息"""
@@ -0,0 +1,62 @@
+import os
+import json
+import threading
+from datetime import datetime
+
+
+class ImageArchive:
+    """解码图像归档
+
+    图像按日期存放在 archive/YYYY-MM-DD/ 目录下，每张图像的元数据
+    （时间、模式、信噪比等）追加写入归档根目录的 index.jsonl。
+    """
+
+    INDEX_FILENAME = 'index.jsonl'
+
+    def __init__(self, root):
+        self.root = root
+        self._lock = threading.Lock()
+        os.makedirs(self.root, exist_ok=True)
+
+    @property
+    def index_path(self):
+        return os.path.join(self.root, self.INDEX_FILENAME)
+
+    def new_image_path(self, received_at=None, mode=None):
+        """为一次接收生成归档图像路径"""
+        received_at = received_at or datetime.now()
+        folder = os.path.join(self.root, received_at.strftime('%Y-%m-%d'))
+        os.makedirs(folder, exist_ok=True)
+        name = f"sstv-{received_at.strftime('%H-%M-%S-%f')}"
+        if mode:
+            name += f"-{mode}"
+        return os.path.join(folder, name + '.jpg')
+
+    def add(self, image_path, metadata):
+        """登记一张已写入的图像，返回索引记录"""
+        entry = dict(metadata)
+        entry['image'] = os.path.relpath(image_path, self.root)
+        with self._lock:
+            with open(self.index_path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+        return entry
+
+    def list_entries(self, limit=None, sort_by=None):
+        """列出归档记录，默认按时间倒序；sort_by='snr' 时按信噪比从高到低排序"""
+        if not os.path.exists(self.index_path):
+            return []
+        entries = []
+        with open(self.index_path, encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    try:
+                        entries.append(json.loads(line))
+                    except ValueError:
+                        continue
+        entries.reverse()
+        if sort_by == 'snr':
+            # 没有信噪比的记录排在最后
+            entries.sort(key=lambda entry: entry.get('snr') if entry.get('snr') is not None
+                         else float('-inf'), reverse=True)
+        return entries[:limit] if limit else entries
@@ -0,0 +1,90 @@
+"""
+SSTV模式参数表
+
+预先计算好的各模式参数（与 pysstv 生成的信号时序一致），供解码器、模式检测等
+使用，无需实例化 pysstv 的模式类。时间单位均为毫秒，通道偏移量相对于行同步
+脉冲的起点，负值表示该通道位于同步脉冲之前（Scottie 系列）。
+
+color 字段说明:
+    'GBR' / 'RGB'  各通道依次为对应颜色分量
+    'YUV420'       Robot36：每行 Y + 一个色差分量（偶数行 Cr，奇数行 Cb）
+    'PD'           PD系列：每个同步脉冲对应两行，通道依次为 Y0、Cr、Cb、Y1
+"""
+
+from collections import OrderedDict
+
+
+def _spec(name, vis_code, width, height, color, sync_ms, line_ms, channels):
+    return name, {
+        'name': name,
+        'vis_code': vis_code,
+        'width': width,
+        'height': height,
+        'color': color,
+        'sync_ms': sync_ms,
+        'line_ms': line_ms,
+        'channels': channels,
+        'lines_per_sync': 2 if color == 'PD' else 1,
+        # 图像起点到第一行同步脉冲的时长（Scottie 系列第一行的同步脉冲位于G、B通道之后）
+        'sync_lead_ms': max(0.0, -min(offset for offset, _ in channels))
+    }
+
+
+# 通道格式: (相对同步脉冲起点的偏移, 扫描时长)
+MODE_SPECS = OrderedDict([
+    _spec('MartinM1', 0x2c, 320, 256, 'GBR', 4.862, 446.446,
+          ((5.434, 146.432), (152.438, 146.432), (299.442, 146.432))),
+    _spec('MartinM2', 0x28, 160, 256, 'GBR', 4.862, 226.798,
+          ((5.434, 73.216), (79.222, 73.216), (153.01, 73.216))),
+    _spec('ScottieS1', 0x3c, 320, 256, 'GBR', 9.0, 428.22,
+          ((-277.98, 136.74), (-138.24, 136.74), (10.5, 136.74))),
+    _spec('ScottieS2', 0x38, 160, 256, 'GBR', 9.0, 277.692,
+          ((-177.628, 86.564), (-88.064, 86.564), (10.5, 86.564))),
+    _spec('ScottieDX', 0x4c, 320, 256, 'GBR', 9.0, 1050.3,
+          ((-692.7, 344.1), (-345.6, 344.1), (10.5, 344.1))),
+    _spec('Robot36', 0x08, 320, 240, 'YUV420', 9.0, 150.0,
+          ((12.0, 88.0), (106.0, 44.0))),
+    _spec('PasokonP3', 0x71, 640, 496, 'RGB', 5.208333, 409.375,
+          ((6.25, 133.333333), (140.625, 133.333333), (275.0, 133.333333))),
+    _spec('PasokonP5', 0x72, 640, 496, 'RGB', 7.8125, 614.0625,
+          ((9.375, 200.0), (210.9375, 200.0), (412.5, 200.0))),
+    _spec('PasokonP7', 0xF3, 640, 496, 'RGB', 10.416667, 818.75,
+          ((12.5, 266.666667), (281.25, 266.666667), (550.0, 266.666667))),
+    _spec('PD90', 0x63, 320, 256, 'PD', 20.0, 703.04,
+          ((22.08, 170.24), (192.32, 170.24), (362.56, 170.24), (532.8, 170.24))),
+    _spec('PD120', 0x5f, 640, 496, 'PD', 20.0, 508.48,
+          ((22.08, 121.6), (143.68, 121.6), (265.28, 121.6), (386.88, 121.6))),
+    _spec('PD160', 0x62, 512, 400, 'PD', 20.0, 804.416,
+          ((22.08, 195.584), (217.664, 195.584), (413.248, 195.584), (608.832, 195.584))),
+    _spec('PD180', 0x60, 640, 496, 'PD', 20.0, 754.24,
+          ((22.08, 183.04), (205.12, 183.04), (388.16, 183.04), (571.2, 183.04))),
+    _spec('PD240', 0x61, 640, 496, 'PD', 20.0, 1000.0,
+          ((22.08, 244.48), (266.56, 244.48), (511.04, 244.48), (755.52, 244.48))),
+    _spec('PD290', 0x5e, 800, 616, 'PD', 20.0, 937.28,
+          ((22.08, 228.8), (250.88, 228.8), (479.68, 228.8), (708.48, 228.8))),
+    _spec('WraaseSC2120', 0x3f, 320, 256, 'RGB', 5.5225, 475.5225,
+          ((6.5225, 156.0), (163.0225, 156.0), (319.5225, 156.0))),
+    _spec('WraaseSC2180', 0x37, 320, 256, 'RGB', 5.5225, 711.0225,
+          ((6.0225, 235.0), (241.0225, 235.0), (476.0225, 235.0))),
+])
+
+# VIS码只传输低7位（PasokonP7 的 0xF3 含奇偶校验位）
+MODES_BY_VIS = {spec['vis_code'] & 0x7f: spec for spec in MODE_SPECS.values()}
+
+# VIS头时长：引导音 300 ms + 间隔符 10 ms + 引导音 300 ms + 10个比特各 30 ms
+VIS_HEADER_MS = 300 + 10 + 300 + 10 * 30
+
+
+def image_seconds(spec):
+    """VIS头之后全部图像行的传输时长（秒）"""
+    lines = spec['height'] // spec['lines_per_sync']
+    return (spec['sync_lead_ms'] + lines * spec['line_ms']) / 1000
+
+
+# 最长一次传输（VIS头 + 图像）的时长，目前为 PasokonP7 的约 407 秒
+MAX_TRANSMISSION_SECONDS = VIS_HEADER_MS / 1000 + max(image_seconds(spec) for spec in MODE_SPECS.values())
+
+
+def get_mode_spec(mode_name):
+    """按名称获取模式参数，不存在时返回 None"""
+    return MODE_SPECS.get(mode_name)
@@ -0,0 +1,47 @@
+import time
+import importlib
+
+# 编码/解码引擎及其依赖的重型库
+ENGINE_MODULES = [
+    'numpy',
+    'scipy.signal',
+    'scipy.fft',
+    'PIL.Image',
+    'soundfile',
+    'pysstv.color',
+    'app.encryption.sstv_encoder',
+    'app.encryption.line_parallel',
+    'app.decryption.sstv_decoder',
+    'app.decryption.mode_detector',
+    'app.decryption.sync_tracker',
+]
+
+
+def preload_engines(sample_rate=44100):
+    """预先导入编码/解码引擎并预热常用的计算表
+
+    在 Gunicorn 主进程中（preload_app）调用时，工作进程 fork 后通过写时复制共享这些
+    模块和缓存，新进程无需再花时间导入。
+
+    Returns:
+        dict: 各模块导入耗时（秒）
+    """
+    timings = {}
+    for name in ENGINE_MODULES:
+        started = time.perf_counter()
+        try:
+            importlib.import_module(name)
+        except ImportError as e:
+            print(f"预加载模块{name}失败: {e}")
+            continue
+        timings[name] = round(time.perf_counter() - started, 4)
+
+    # 预热VIS检测使用的 Goertzel 基矩阵
+    started = time.perf_counter()
+    import numpy as np
+    from app.decryption.tone_detector import tone_energy
+    from app.decryption.mode_detector import COARSE_FREQS, VIS_FREQS, FRAME_MS, MSEC_VIS_BIT
+    tone_energy(np.zeros((1, int(sample_rate * FRAME_MS / 1000))), COARSE_FREQS, sample_rate)
+    tone_energy(np.zeros((1, int(round(sample_rate * MSEC_VIS_BIT / 1000)))), VIS_FREQS, sample_rate)
+    timings['tables'] = round(time.perf_counter() - started, 4)
+    return timings
@@ -0,0 +1,166 @@
+import os
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory, resource_tracker
+import numpy as np
+
+# 超过该字节数的数组参数通过共享内存传递，较小的数组直接随任务序列化
+SHARE_THRESHOLD = 64 * 1024
+
+
+class SharedArray:
+    """存放在共享内存中的 NumPy 数组
+
+    序列化时只传递共享内存名称、形状和类型，子进程反序列化后直接映射同一块内存，
+    得到零拷贝的数组视图。创建者负责调用 unlink 释放共享内存。
+    """
+
+    def __init__(self, shape, dtype=np.float32, name=None):
+        self.shape = tuple(int(n) for n in np.ravel(shape))
+        self.dtype = np.dtype(dtype)
+        size = max(1, int(np.prod(self.shape)) * self.dtype.itemsize)
+        self._owner = name is None
+        self._shm = shared_memory.SharedMemory(name=name, create=self._owner, size=size if self._owner else 0)
+        self.array = np.ndarray(self.shape, dtype=self.dtype, buffer=self._shm.buf)
+
+    @classmethod
+    def from_array(cls, array):
+        """把数组复制到新分配的共享内存中（只复制一次）"""
+        array = np.asarray(array)
+        shared = cls(array.shape, array.dtype)
+        shared.array[...] = array
+        return shared
+
+    @property
+    def name(self):
+        return self._shm.name
+
+    def __getstate__(self):
+        return {'name': self.name, 'shape': self.shape, 'dtype': self.dtype.str}
+
+    def __setstate__(self, state):
+        self.__init__(state['shape'], state['dtype'], name=state['name'])
+
+    def close(self):
+        """解除本进程的映射（仍有视图引用时保留映射，由垃圾回收处理）"""
+        self.array = None
+        try:
+            self._shm.close()
+        except BufferError:
+            pass
+
+    def unlink(self):
+        """释放共享内存，只应由创建者调用"""
+        self.close()
+        if self._owner:
+            try:
+                self._shm.unlink()
+            except FileNotFoundError:
+                pass
+
+
+def _init_worker(sample_rate):
+    """工作进程初始化：预先导入编码/解码引擎并预热计算表，之后的任务无需再付出这部分开销"""
+    from app.utils.warmup import preload_engines
+
+    preload_engines(sample_rate)
+
+
+def _run_task(func, args, kwargs):
+    """在工作进程中执行任务，把共享数组参数替换为零拷贝视图"""
+    shared = [value for value in list(args) + list(kwargs.values()) if isinstance(value, SharedArray)]
+    args = [value.array if isinstance(value, SharedArray) else value for value in args]
+    kwargs = {key: value.array if isinstance(value, SharedArray) else value
+              for key, value in kwargs.items()}
+    try:
+        return func(*args, **kwargs)
+    finally:
+        del args, kwargs
+        for value in shared:
+            value.close()
+
+
+class SharedWorkerPool:
+    """通过共享内存传递大数组的长期工作进程池
+
+    普通进程池要把音频、图像数组序列化后经管道发送，短模式（如 Robot36）的任务有相当一部分
+    时间花在这上面。本进程池把较大的数组参数放入共享内存，只传递其名称；工作进程在启动时
+    预热编码/解码引擎并长期复用。
+
+    需要把结果直接写回父进程时，可用 empty() 分配共享输出数组作为参数传入。
+    """
+
+    def __init__(self, workers=None, sample_rate=44100, warmup=True, context=None):
+        self.workers = workers or os.cpu_count() or 1
+        # 工作进程须与本进程共用同一个资源跟踪进程，否则它们映射过的共享内存会在退出时被误报为泄漏
+        resource_tracker.ensure_running()
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context(context) if context else None,
+            initializer=_init_worker if warmup else None,
+            initargs=(sample_rate,) if warmup else ())
+
+    @staticmethod
+    def empty(shape, dtype=np.float32):
+        """分配共享数组（调用者负责 unlink）"""
+        return SharedArray(shape, dtype)
+
+    @staticmethod
+    def share(array):
+        """把数组复制到共享内存，可在多个任务之间复用（调用者负责 unlink）"""
+        return SharedArray.from_array(array)
+
+    def submit(self, func, *args, **kwargs):
+        """提交任务，返回 Future
+
+        func 必须是可按名称导入的模块级函数或类的静态方法。较大的 ndarray 参数会自动复制到
+        共享内存，任务结束后释放；已是 SharedArray 的参数直接传递名称。
+        """
+        temporary = []
+
+        def convert(value):
+            if isinstance(value, np.ndarray) and value.nbytes >= SHARE_THRESHOLD:
+                value = SharedArray.from_array(value)
+                temporary.append(value)
+            return value
+
+        args = tuple(convert(value) for value in args)
+        kwargs = {key: convert(value) for key, value in kwargs.items()}
+        try:
+            future = self._executor.submit(_run_task, func, args, kwargs)
+        except Exception:
+            for value in temporary:
+                value.unlink()
+            raise
+        if temporary:
+            future.add_done_callback(lambda _: [value.unlink() for value in temporary])
+        return future
+
+    def map(self, func, *iterables):
+        """并行执行 func 并按顺序返回结果列表"""
+        futures = [self.submit(func, *args) for args in zip(*iterables)]
+        return [future.result() for future in futures]
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait)
+
+
+# 进程内共享的工作进程池
+_worker_pool = None
+_worker_pool_lock = threading.Lock()
+
+
+def get_worker_pool(config):
+    """按应用配置获取进程内唯一的工作进程池，WORKER_PROCESSES 为 0 时返回 None（在进程内执行）"""
+    global _worker_pool
+    workers = config.get('WORKER_PROCESSES', 0)
+    if not workers:
+        return None
+    with _worker_pool_lock:
+        if _worker_pool is None:
+            # 进程池在请求线程中按需创建，此时服务进程已有多个线程（采集服务、其他请求），
+            # fork 会把其他线程持有的锁原样复制到子进程中，因此改用 forkserver（不支持时用 spawn）
+            context = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+            _worker_pool = SharedWorkerPool(workers, config.get('SSTV_SAMPLE_RATE', 44100), context=context)
+        return _worker_pool
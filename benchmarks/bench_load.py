@@ -0,0 +1,364 @@
+"""
+HTTP 接口负载测试：在子进程中用 create_app 启动多线程服务器（声卡替换为读取音频文件的
+模拟设备），以指定并发度持续请求编码、模式列表、解码和录音解码接口，统计吞吐量、
+延迟百分位数、错误率以及服务器进程的 CPU 和内存占用
+
+用法:
+    python -m benchmarks.bench_load                                # 默认 4 并发，20 秒
+    python -m benchmarks.bench_load --concurrency 16 --duration 60
+    python -m benchmarks.bench_load --endpoints encode_image decode_audio
+    python -m benchmarks.bench_load --url http://node:3000         # 测试已部署的服务（无服务器资源统计）
+
+作为基准（python -m benchmarks.run --only load）运行时，并发度和时长取自环境变量
+SSTV_LOAD_CONCURRENCY、SSTV_LOAD_SECONDS。
+"""
+
+import os
+import sys
+import json
+import time
+import uuid
+import struct
+import random
+import shutil
+import argparse
+import tempfile
+import threading
+import subprocess
+import urllib.request
+
+from benchmarks.common import (BASELINE_PATH, DEFAULT_TOLERANCE, median, percentile,
+                               load_baseline, compare_with_baseline, print_metrics)
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+ENDPOINTS = ('encode_image', 'get_modes', 'decode_audio', 'record_and_decode')
+
+# 允许的最大错误率
+MAX_ERROR_RATE = float(os.environ.get('SSTV_LOAD_MAX_ERROR_RATE', '0.01'))
+
+# 服务器使用的各数据目录（负载测试时全部指向临时目录）
+FOLDER_SETTINGS = {
+    'UPLOAD_FOLDER': 'uploads',
+    'DATA_FOLDER': 'data',
+    'ARCHIVE_FOLDER': 'data/archive',
+    'DECODE_CACHE_FOLDER': 'data/decode_cache',
+    'SEGMENT_CACHE_FOLDER': 'data/segment_cache'
+}
+
+
+def make_fixtures(workdir, mode='Robot36', sample_rate=44100):
+    """生成测试图像和对应的SSTV音频（前后各留 1 秒静音）"""
+    import numpy as np
+    import soundfile as sf
+    from PIL import Image
+    from app.encryption.sstv_encoder import SSTVEncoder
+
+    image_path = os.path.join(workdir, 'fixture.png')
+    Image.linear_gradient('L').convert('RGB').resize((320, 256)).save(image_path)
+
+    audio_path = os.path.join(workdir, 'fixture.wav')
+    result = SSTVEncoder.encode_image(image_path, audio_path, mode, sample_rate, parallel=True)
+    if not result['success']:
+        raise RuntimeError(f"生成测试音频失败: {result['error']}")
+    audio, _ = sf.read(audio_path, dtype='int16')
+    silence = np.zeros(sample_rate, dtype=np.int16)
+    sf.write(audio_path, np.concatenate([silence, audio, silence]), sample_rate, subtype='PCM_16')
+
+    with open(image_path, 'rb') as f:
+        image_bytes = f.read()
+    with open(audio_path, 'rb') as f:
+        audio_bytes = f.read()
+    return {
+        'mode': mode,
+        'image': image_bytes,
+        'audio': audio_bytes,
+        'audio_path': audio_path,
+        'audio_seconds': sf.info(audio_path).duration
+    }
+
+
+def encode_multipart(fields=(), files=()):
+    """构造 multipart/form-data 请求体"""
+    boundary = uuid.uuid4().hex
+    parts = []
+    for name, value in fields:
+        parts.append(f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n'
+                     f'{value}\r\n'.encode('utf-8'))
+    for name, filename, data, content_type in files:
+        parts.append(f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"; '
+                     f'filename="{filename}"\r\nContent-Type: {content_type}\r\n\r\n'.encode('utf-8'))
+        parts.append(data)
+        parts.append(b'\r\n')
+    parts.append(f'--{boundary}--\r\n'.encode('utf-8'))
+    return b''.join(parts), f'multipart/form-data; boundary={boundary}'
+
+
+def build_requests(fixtures):
+    """各接口的请求构造函数：number -> (方法, 路径, 请求体, Content-Type)"""
+    record_seconds = int(fixtures['audio_seconds']) + 1
+
+    def encode_image(number):
+        body, content_type = encode_multipart(
+            [('mode', fixtures['mode'])],
+            [('image_file', 'load.png', fixtures['image'], 'image/png')])
+        return 'POST', '/api/encryption/encode_image', body, content_type
+
+    def get_modes(number):
+        return 'GET', '/api/encryption/get_modes', None, None
+
+    def decode_audio(number):
+        # 改写文件末尾静音中的最后一个样本，使每次上传的内容不同，避免命中解码缓存
+        audio = fixtures['audio'][:-8] + struct.pack('<q', number)
+        body, content_type = encode_multipart(
+            files=[('audio_file', f'load-{number}.wav', audio, 'audio/wav')])
+        return 'POST', '/api/decryption/decode_audio', body, content_type
+
+    def record_and_decode(number):
+        body, content_type = encode_multipart([('duration', record_seconds)])
+        return 'POST', '/api/decryption/record_and_decode', body, content_type
+
+    return {
+        'encode_image': encode_image,
+        'get_modes': get_modes,
+        'decode_audio': decode_audio,
+        'record_and_decode': record_and_decode
+    }
+
+
+def send(base_url, method, path, body, content_type, timeout=300):
+    """发送一次请求，返回 (耗时秒数, 是否成功, 错误信息)"""
+    headers = {'Content-Type': content_type} if content_type else {}
+    request = urllib.request.Request(base_url + path, data=body, method=method, headers=headers)
+    started = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            payload = json.loads(response.read().decode('utf-8'))
+        ok = bool(payload.get('success'))
+        error = None if ok else str(payload.get('error') or payload.get('message'))
+    except Exception as e:
+        ok, error = False, str(e)
+    return time.perf_counter() - started, ok, error
+
+
+def run_load(base_url, requests, endpoints, concurrency, duration):
+    """以 concurrency 个客户端线程轮流请求各接口，持续 duration 秒
+
+    Returns:
+        tuple: ([(接口, 耗时, 是否成功, 错误信息), ...], 实际持续时间)
+    """
+    samples = []
+    counter = iter(range(1, 1 << 62))
+    counter_lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def client(index):
+        order = list(endpoints)
+        random.Random(index).shuffle(order)
+        position = 0
+        while time.perf_counter() < deadline:
+            name = order[position % len(order)]
+            position += 1
+            with counter_lock:
+                number = next(counter)
+            latency, ok, error = send(base_url, *requests[name](number))
+            samples.append((name, latency, ok, error))
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=client, args=(i,), daemon=True) for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return samples, time.perf_counter() - started
+
+
+def summarize(samples, elapsed, prefix='load'):
+    """把请求记录汇总为指标字典，并返回各接口出现的错误信息"""
+    metrics = {}
+    errors = {}
+    groups = {}
+    for name, latency, ok, error in samples:
+        groups.setdefault(name, []).append((latency, ok))
+        if not ok:
+            errors.setdefault(name, set()).add(error)
+
+    total = len(samples)
+    failed = sum(1 for sample in samples if not sample[2])
+    metrics[f'{prefix}.requests_per_sec'] = round(total / elapsed, 3) if elapsed else 0.0
+    metrics[f'{prefix}.error_rate'] = round(failed / total, 4) if total else 0.0
+    for name, records in sorted(groups.items()):
+        latencies = [latency for latency, _ in records]
+        metrics[f'{prefix}.{name}.requests_per_sec'] = round(len(records) / elapsed, 3)
+        metrics[f'{prefix}.{name}.error_rate'] = round(sum(1 for _, ok in records if not ok) / len(records), 4)
+        metrics[f'{prefix}.{name}.p50_seconds'] = round(median(latencies), 4)
+        metrics[f'{prefix}.{name}.p95_seconds'] = round(percentile(latencies, 95), 4)
+        metrics[f'{prefix}.{name}.p99_seconds'] = round(percentile(latencies, 99), 4)
+    return metrics, errors
+
+
+def resource_usage():
+    """当前进程的 CPU 时间和峰值内存（不支持 resource 模块的平台返回空字典）"""
+    try:
+        import resource
+    except ImportError:
+        return {}
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    # Linux 下 ru_maxrss 单位为 KB，macOS 下为字节
+    max_rss = usage.ru_maxrss / (1024 * 1024) if sys.platform == 'darwin' else usage.ru_maxrss / 1024
+    return {
+        'cpu_seconds': usage.ru_utime + usage.ru_stime,
+        'max_rss_mb': round(max_rss, 1),
+        'time': time.time()
+    }
+
+
+def serve(workdir):
+    """负载测试服务器进程：启动后打印端口，之后按标准输入的命令报告资源占用或退出
+
+    标准输出只用于和父进程通信，应用自身的输出和请求日志被丢弃。
+    """
+    import logging
+    from benchmarks import fake_sounddevice
+
+    channel = sys.stdout
+    sys.stdout = open(os.devnull, 'w')
+    logging.getLogger('werkzeug').setLevel(logging.WARNING)
+    fake_sounddevice.install()
+
+    from werkzeug.serving import make_server
+    from app import create_app
+    from app.config import Config
+
+    for name, folder in FOLDER_SETTINGS.items():
+        setattr(Config, name, os.path.join(workdir, folder))
+    app = create_app(os.environ.get('SSTV_LOAD_CONFIG', 'prod'))
+
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    print(f"READY {server.server_port}", file=channel, flush=True)
+
+    for line in sys.stdin:
+        command = line.strip()
+        print(json.dumps(resource_usage()), file=channel, flush=True)
+        if command == 'stop':
+            break
+    server.shutdown()
+
+
+class LoadTestServer:
+    """在子进程中运行的负载测试服务器"""
+
+    def __init__(self, workdir, fake_audio, time_scale=0.0):
+        env = dict(os.environ, SSTV_FAKE_AUDIO=fake_audio, SSTV_FAKE_TIME_SCALE=str(time_scale))
+        env.pop('SSTV_CAPTURE_SOURCE', None)
+        self.process = subprocess.Popen(
+            [sys.executable, '-m', 'benchmarks.bench_load', '--serve', workdir],
+            cwd=ROOT, env=env, stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True)
+        line = self.process.stdout.readline()
+        if not line.startswith('READY'):
+            self.process.kill()
+            raise RuntimeError("负载测试服务器启动失败")
+        self.url = f"http://127.0.0.1:{line.split()[1]}"
+
+    def usage(self, command='usage'):
+        self.process.stdin.write(command + '\n')
+        self.process.stdin.flush()
+        return json.loads(self.process.stdout.readline())
+
+    def stop(self):
+        try:
+            return self.usage('stop')
+        finally:
+            self.process.wait(timeout=30)
+
+
+def measure(concurrency=4, duration=20.0, endpoints=ENDPOINTS, mode='Robot36', url=None,
+            time_scale=0.0):
+    """运行一次负载测试，返回 (指标字典, 各接口错误信息)"""
+    workdir = tempfile.mkdtemp(prefix='sstv-load-')
+    fixtures = make_fixtures(workdir, mode)
+    requests = build_requests(fixtures)
+
+    server = None if url else LoadTestServer(workdir, fixtures['audio_path'], time_scale)
+    base_url = url or server.url
+    try:
+        # 预热：每个接口各请求一次（首次请求时导入编码/解码引擎）
+        for name in endpoints:
+            send(base_url, *requests[name](0))
+        before = server.usage() if server else {}
+        samples, elapsed = run_load(base_url, requests, endpoints, concurrency, duration)
+        after = server.usage() if server else {}
+    finally:
+        if server:
+            server.stop()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    metrics, errors = summarize(samples, elapsed)
+    if before and after:
+        cpu = after['cpu_seconds'] - before['cpu_seconds']
+        metrics['load.server_cpu_seconds_per_request'] = round(cpu / max(1, len(samples)), 4)
+        metrics['load.server_cpu_utilization'] = round(cpu / (after['time'] - before['time']), 3)
+        metrics['load.server_max_rss_mb'] = after['max_rss_mb']
+    return metrics, errors
+
+
+def run():
+    """作为基准运行（参数取自环境变量），返回指标字典"""
+    metrics, errors = measure(int(os.environ.get('SSTV_LOAD_CONCURRENCY', '4')),
+                              float(os.environ.get('SSTV_LOAD_SECONDS', '20')))
+    print_errors(errors)
+    return metrics
+
+
+def check_budget(metrics):
+    """检查错误率，返回错误信息列表"""
+    if metrics.get('load.error_rate', 0) > MAX_ERROR_RATE:
+        return [f"负载测试错误率 {metrics['load.error_rate']:.2%} 超出上限 {MAX_ERROR_RATE:.2%}"]
+    return []
+
+
+def print_errors(errors):
+    for name, messages in sorted(errors.items()):
+        for message in sorted(messages)[:3]:
+            print(f"  {name} 错误: {message}")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='HTTP 接口负载测试')
+    parser.add_argument('--concurrency', type=int, default=4, help='并发客户端数')
+    parser.add_argument('--duration', type=float, default=20.0, help='持续时间（秒）')
+    parser.add_argument('--endpoints', nargs='+', choices=ENDPOINTS, default=list(ENDPOINTS),
+                        help='参与测试的接口')
+    parser.add_argument('--mode', default='Robot36', help='编码测试图像和生成测试音频使用的模式')
+    parser.add_argument('--url', help='测试已部署的服务，不在本地启动服务器')
+    parser.add_argument('--time-scale', type=float, default=0.0,
+                        help='模拟录音耗时与实际录音时长之比（0 表示立即返回）')
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE, help='允许的相对退化幅度')
+    parser.add_argument('--baseline', default=BASELINE_PATH, help='基线文件路径')
+    parser.add_argument('--serve', metavar='WORKDIR', help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.serve:
+        serve(args.serve)
+        return 0
+
+    metrics, errors = measure(args.concurrency, args.duration, args.endpoints, args.mode,
+                              args.url, args.time_scale)
+    baseline = load_baseline(args.baseline)
+    print_metrics(metrics, baseline)
+    print_errors(errors)
+
+    problems = check_budget(metrics)
+    for name, base, value, change in compare_with_baseline(metrics, baseline, args.tolerance):
+        problems.append(f"{name} 相对基线退化 {change:+.1%}（基线 {base}，本次 {value}）")
+    for problem in problems:
+        print(f"错误：{problem}")
+    return 1 if problems else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
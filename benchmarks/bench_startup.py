@@ -0,0 +1,77 @@
+"""
+启动性能基准：在全新子进程中测量导入 app 与 create_app 的耗时，
+并检查启动阶段是否导入了编码/解码引擎依赖的重型库
+"""
+
+import os
+import sys
+import json
+import subprocess
+
+from benchmarks.common import median
+
+# 冷启动（导入 + 创建应用）耗时预算（秒）
+IMPORT_BUDGET_SECONDS = float(os.environ.get('SSTV_IMPORT_BUDGET', '1.0'))
+
+# 不应在启动阶段导入的模块
+HEAVY_MODULES = ('numpy', 'scipy', 'PIL', 'soundfile', 'pysstv', 'sounddevice')
+
+PROBE = """
+import sys, json, time
+started = time.perf_counter()
+import app
+imported = time.perf_counter()
+app.create_app()
+created = time.perf_counter()
+print(json.dumps({
+    'import': imported - started,
+    'create_app': created - imported,
+    'heavy': [m for m in %r if m in sys.modules]
+}))
+"""
+
+
+def probe_startup(env=None):
+    """在子进程中测量一次冷启动"""
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    output = subprocess.check_output([sys.executable, '-c', PROBE % (HEAVY_MODULES,)],
+                                     cwd=root, env=env)
+    return json.loads(output.decode('utf-8').strip().splitlines()[-1])
+
+
+def run(repeat=5):
+    """运行启动基准，返回指标字典"""
+    samples = [probe_startup() for _ in range(repeat)]
+    env = dict(os.environ, SSTV_PRELOAD_ENGINES='1')
+    preload = [probe_startup(env) for _ in range(max(1, repeat // 2))]
+
+    metrics = {
+        'startup.import_seconds': round(median([s['import'] for s in samples]), 4),
+        'startup.create_app_seconds': round(median([s['create_app'] for s in samples]), 4),
+        'startup.total_seconds': round(median([s['import'] + s['create_app'] for s in samples]), 4),
+        'startup.preload_total_seconds': round(median([s['import'] + s['create_app'] for s in preload]), 4),
+        'startup.heavy_modules_loaded': len(samples[0]['heavy'])
+    }
+    return metrics
+
+
+def check_budget(metrics):
+    """检查启动预算，返回错误信息列表"""
+    errors = []
+    if metrics['startup.total_seconds'] > IMPORT_BUDGET_SECONDS:
+        errors.append(f"冷启动耗时 {metrics['startup.total_seconds']:.3f}s 超出预算 {IMPORT_BUDGET_SECONDS:.3f}s")
+    if metrics['startup.heavy_modules_loaded']:
+        heavy = probe_startup()['heavy']
+        errors.append(f"启动阶段导入了重型模块: {', '.join(heavy)}")
+    return errors
+
+
+if __name__ == '__main__':
+    from benchmarks.common import print_metrics
+
+    result = run()
+    print_metrics(result)
+    problems = check_budget(result)
+    for problem in problems:
+        print(f"错误：{problem}")
+    sys.exit(1 if problems else 0)
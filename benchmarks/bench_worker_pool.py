@@ -0,0 +1,104 @@
+"""
+工作进程池基准：比较同一任务在当前进程内执行、经普通进程池（序列化传递数组）执行、
+经共享内存工作进程池执行时的单任务耗时，得出每个任务的额外开销
+"""
+
+import os
+import sys
+import time
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from benchmarks.common import median
+
+# 任务音频时长（秒），与 Robot36 一幅图像相当
+AUDIO_SECONDS = 37
+SAMPLE_RATE = 44100
+
+
+def checksum(audio):
+    """极轻量的任务：只读取一遍数组，耗时主要是任务分发和数据传递的开销"""
+    return float(audio.sum(dtype=np.float64))
+
+
+def time_jobs(submit, repeat):
+    """逐个提交任务并等待完成，返回单任务耗时中位数"""
+    durations = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        submit()
+        durations.append(time.perf_counter() - started)
+    return median(durations)
+
+
+def make_audio():
+    """生成一段 Robot36 测试音频（float32）"""
+    from PIL import Image
+    from pysstv.color import Robot36
+
+    img = Image.linear_gradient('L').convert('RGB').resize((Robot36.WIDTH, Robot36.HEIGHT))
+    audio = np.fromiter(Robot36(img, SAMPLE_RATE, 16).gen_values(), dtype=np.float32) * 0.5
+    return audio[:AUDIO_SECONDS * SAMPLE_RATE]
+
+
+def run(repeat=20, decode_repeat=3, workers=2):
+    """运行工作进程池基准，返回指标字典"""
+    from app.decryption.sstv_decoder import SSTVDecoder
+    from app.utils.worker_pool import SharedWorkerPool
+
+    audio = make_audio()
+    output_path = os.path.join(tempfile.mkdtemp(prefix='sstv-bench-'), 'decoded.png')
+    metrics = {}
+
+    # 当前进程内
+    inprocess = time_jobs(lambda: checksum(audio), repeat)
+
+    # 普通进程池：数组随任务序列化
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        executor.submit(checksum, audio[:1]).result()
+        pickled = time_jobs(lambda: executor.submit(checksum, audio).result(), repeat)
+
+    # 共享内存进程池：每个任务复制一次到共享内存 / 预先共享后零拷贝
+    pool = SharedWorkerPool(workers, SAMPLE_RATE)
+    try:
+        pool.submit(checksum, audio[:1]).result()
+        shared = time_jobs(lambda: pool.submit(checksum, audio).result(), repeat)
+        preshared_array = pool.share(audio)
+        try:
+            preshared = time_jobs(lambda: pool.submit(checksum, preshared_array).result(), repeat)
+        finally:
+            preshared_array.unlink()
+
+        # 实际解码任务：进程内与工作进程池（已预热）对比，以及并行吞吐
+        decode_inprocess = time_jobs(
+            lambda: SSTVDecoder.decode_samples(audio, SAMPLE_RATE, output_path), decode_repeat)
+        decode_pool = time_jobs(
+            lambda: pool.submit(SSTVDecoder.decode_samples, audio, SAMPLE_RATE, output_path).result(),
+            decode_repeat)
+        started = time.perf_counter()
+        batch = workers * decode_repeat
+        pool.map(SSTVDecoder.decode_samples, [audio] * batch, [SAMPLE_RATE] * batch,
+                 [output_path] * batch)
+        decode_throughput = batch / (time.perf_counter() - started)
+    finally:
+        pool.shutdown()
+
+    metrics.update({
+        'worker_pool.inprocess_job_seconds': round(inprocess, 5),
+        'worker_pool.pickled_overhead_seconds': round(pickled - inprocess, 5),
+        'worker_pool.shared_overhead_seconds': round(shared - inprocess, 5),
+        'worker_pool.preshared_overhead_seconds': round(preshared - inprocess, 5),
+        'worker_pool.decode_inprocess_seconds': round(decode_inprocess, 4),
+        'worker_pool.decode_pool_seconds': round(decode_pool, 4),
+        'worker_pool.decode_jobs_per_sec': round(decode_throughput, 3)
+    })
+    return metrics
+
+
+if __name__ == '__main__':
+    from benchmarks.common import print_metrics
+
+    print_metrics(run())
+    sys.exit(0)
@@ -0,0 +1,72 @@
+import os
+import json
+import statistics
+
+BENCH_DIR = os.path.abspath(os.path.dirname(__file__))
+BASELINE_PATH = os.path.join(BENCH_DIR, 'baseline.json')
+RESULTS_DIR = os.path.join(BENCH_DIR, 'results')
+
+# 默认允许相对基线的退化幅度
+DEFAULT_TOLERANCE = 0.25
+
+
+def median(values):
+    """中位数（重复测量时取中位数以降低抖动）"""
+    return statistics.median(values)
+
+
+def percentile(values, pct):
+    """线性插值百分位数"""
+    values = sorted(values)
+    if not values:
+        return 0.0
+    rank = (len(values) - 1) * pct / 100.0
+    low = int(rank)
+    high = min(low + 1, len(values) - 1)
+    return values[low] + (values[high] - values[low]) * (rank - low)
+
+
+def load_baseline(path=BASELINE_PATH):
+    """读取基线指标，不存在时返回空字典"""
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_results(metrics, path):
+    """保存指标到 JSON 文件"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(metrics, f, indent=2, sort_keys=True, ensure_ascii=False)
+
+
+def compare_with_baseline(metrics, baseline, tolerance=DEFAULT_TOLERANCE):
+    """与基线比较，返回退化的指标列表
+
+    指标名以 _per_sec 结尾的越大越好，其余（耗时、内存、错误率等）越小越好。
+
+    Returns:
+        list: [(指标名, 基线值, 当前值, 相对变化)]
+    """
+    regressions = []
+    for name, value in sorted(metrics.items()):
+        base = baseline.get(name)
+        if not isinstance(base, (int, float)) or not isinstance(value, (int, float)) or base == 0:
+            continue
+        change = (value - base) / abs(base)
+        higher_is_better = name.endswith('_per_sec')
+        if (higher_is_better and change < -tolerance) or (not higher_is_better and change > tolerance):
+            regressions.append((name, base, value, change))
+    return regressions
+
+
+def print_metrics(metrics, baseline=None):
+    """打印指标（有基线时同时打印变化幅度）"""
+    baseline = baseline or {}
+    for name, value in sorted(metrics.items()):
+        line = f"  {name:<48} {value:>12.4f}" if isinstance(value, float) else f"  {name:<48} {value!s:>12}"
+        base = baseline.get(name)
+        if isinstance(base, (int, float)) and isinstance(value, (int, float)) and base:
+            line += f"   (基线 {base:.4f}, {(value - base) / abs(base):+.1%})"
+        print(line)
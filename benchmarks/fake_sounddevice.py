@@ -0,0 +1,52 @@
+"""
+用音频文件模拟 sounddevice 的录音接口（负载测试用）
+
+安装后 SSTVDecoder.record_and_decode 的 sd.rec / sd.wait 从 SSTV_FAKE_AUDIO 指定的文件
+循环读取样本，无需声卡。SSTV_FAKE_TIME_SCALE 控制 wait() 模拟录音耗时的比例：
+1 表示按实际时长等待，0（默认）表示立即返回。
+"""
+
+import os
+import sys
+import time
+import threading
+
+import numpy as np
+
+_lock = threading.Lock()
+_audio = None
+_pending = threading.local()
+
+
+def _load(samplerate):
+    global _audio
+    with _lock:
+        if _audio is None:
+            import soundfile as sf
+
+            audio, rate = sf.read(os.environ['SSTV_FAKE_AUDIO'], dtype='float32', always_2d=True)
+            if rate != samplerate:
+                raise ValueError(f"模拟音频采样率为 {rate}，录音请求为 {samplerate}")
+            _audio = audio.mean(axis=1)
+        return _audio
+
+
+def rec(frames, samplerate=None, channels=1, dtype='float32', **kwargs):
+    """返回 frames 个样本（文件不够长时循环），形状与 sounddevice 相同"""
+    audio = _load(samplerate)
+    repeats = -(-int(frames) // len(audio))
+    data = np.tile(audio, repeats)[:int(frames)].astype(dtype)
+    _pending.until = time.monotonic() + float(os.environ.get('SSTV_FAKE_TIME_SCALE', '0')) * frames / samplerate
+    return np.repeat(data[:, None], channels, axis=1)
+
+
+def wait():
+    """按 SSTV_FAKE_TIME_SCALE 模拟等待录音结束"""
+    remaining = getattr(_pending, 'until', 0) - time.monotonic()
+    if remaining > 0:
+        time.sleep(remaining)
+
+
+def install():
+    """用本模块替换 sounddevice"""
+    sys.modules['sounddevice'] = sys.modules[__name__]
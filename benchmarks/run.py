@@ -0,0 +1,72 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+性能基准测试入口
+运行全部基准，检查预算，并与基线 (benchmarks/baseline.json) 比较
+
+用法:
+    python -m benchmarks.run                     # 运行并与基线比较
+    python -m benchmarks.run --update-baseline   # 以本次结果更新基线
+    python -m benchmarks.run --only startup
+"""
+
+import os
+import sys
+import argparse
+import importlib
+from datetime import datetime
+
+from benchmarks.common import (BASELINE_PATH, RESULTS_DIR, DEFAULT_TOLERANCE, load_baseline,
+                               save_results, compare_with_baseline, print_metrics)
+
+# 基准名称 -> 模块；模块提供 run() 返回指标字典，可选提供 check_budget(metrics)
+BENCHMARKS = {
+    'startup': 'benchmarks.bench_startup',
+    'worker_pool': 'benchmarks.bench_worker_pool',
+    'load': 'benchmarks.bench_load',
+}
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='运行性能基准测试并与基线比较')
+    parser.add_argument('--only', action='append', choices=sorted(BENCHMARKS), help='只运行指定基准')
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE, help='允许的相对退化幅度')
+    parser.add_argument('--baseline', default=BASELINE_PATH, help='基线文件路径')
+    parser.add_argument('--update-baseline', action='store_true', help='以本次结果更新基线')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    baseline = load_baseline(args.baseline)
+    metrics = {}
+    problems = []
+
+    for name in args.only or list(BENCHMARKS):
+        module = importlib.import_module(BENCHMARKS[name])
+        print(f"运行基准: {name}")
+        result = module.run()
+        print_metrics(result, baseline)
+        metrics.update(result)
+        if hasattr(module, 'check_budget'):
+            problems.extend(module.check_budget(result))
+
+    timestamp = datetime.now().strftime('%Y-%m-%d-%H-%M-%S')
+    save_results(metrics, os.path.join(RESULTS_DIR, f"results-{timestamp}.json"))
+
+    for name, base, value, change in compare_with_baseline(metrics, baseline, args.tolerance):
+        problems.append(f"{name} 相对基线退化 {change:+.1%}（基线 {base}，本次 {value}）")
+
+    if args.update_baseline:
+        baseline.update(metrics)
+        save_results(baseline, args.baseline)
+        print(f"基线已更新: {args.baseline}")
+
+    for problem in problems:
+        print(f"错误：{problem}")
+    return 1 if problems and not args.update_baseline else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1 @@
+# 让直接运行 pytest 时也能导入 app 包（pytest 会把本文件所在目录加入 sys.path）
@@ -0,0 +1,26 @@
+# Gunicorn 配置
+# 用法: gunicorn -c gunicorn.conf.py "app:create_app('prod')"
+import os
+
+bind = os.environ.get('SSTV_BIND', '0.0.0.0:3000')
+workers = int(os.environ.get('SSTV_WORKERS', '4'))
+
+# 音频采集服务（/api/capture）只存在于启动它的进程中，启用时只能有一个工作进程，
+# 改用线程处理并发请求（长轮询请求会占用线程）
+capture_enabled = os.environ.get('SSTV_CAPTURE_ENABLED') == '1'
+if capture_enabled:
+    workers = 1
+    threads = int(os.environ.get('SSTV_THREADS', '16'))
+
+# 设置 SSTV_PRELOAD_ENGINES=1 时在主进程中创建应用并预加载编码/解码引擎，
+# 工作进程 fork 后直接共享已导入的模块，扩容时新进程可以立即处理请求
+preload_app = os.environ.get('SSTV_PRELOAD_ENGINES') == '1'
+
+
+def on_starting(server):
+    """命令行的 -w 参数会覆盖本文件中的 workers，启用采集时在这里再次强制为 1"""
+    if capture_enabled and server.cfg.workers > 1:
+        server.log.warning("已启用音频采集服务（SSTV_CAPTURE_ENABLED=1），工作进程数由 %s 改为 1",
+                           server.cfg.workers)
+        server.cfg.set('workers', 1)
+        server.num_workers = 1
@@ -0,0 +1,112 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+SSTV连续监听守护进程
+持续接收音频，检测到VIS头时自动解码，并把图像及元数据写入归档
+
+用法:
+    python monitor.py                              # 监听默认声卡
+    python monitor.py --input capture.wav          # 处理音频文件
+    arecord -f S16_LE -r 44100 -c 1 | python monitor.py --input -   # 从标准输入读取PCM
+"""
+
+import os
+import sys
+import argparse
+from datetime import datetime, timedelta
+
+from app.config import Config
+from app.decryption.audio_capture import (AudioCaptureService, FileAudioSource,
+                                          PCMStreamSource, create_device_source)
+from app.decryption.monitor import TriggeredDecoder
+from app.utils.image_archive import ImageArchive
+
+
+def parse_args(argv=None):
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description='SSTV连续监听：检测到VIS头时自动解码并归档')
+    parser.add_argument('--input', default='device',
+                        help="输入：device 表示声卡，- 表示标准输入PCM（16位单声道），其余视为音频文件路径")
+    parser.add_argument('--device', default=None, help='声卡设备名称或编号')
+    parser.add_argument('--sample-rate', type=int, default=Config.SSTV_SAMPLE_RATE,
+                        help='声卡/标准输入的采样率')
+    parser.add_argument('--archive', default=Config.ARCHIVE_FOLDER, help='图像归档目录')
+    parser.add_argument('--realtime', action='store_true',
+                        help='按实际速度回放音频文件（默认尽快处理）')
+    return parser.parse_args(argv)
+
+
+def create_source(args):
+    """根据参数创建音频输入源"""
+    if args.input == 'device':
+        device = int(args.device) if args.device and args.device.isdigit() else args.device
+        return create_device_source(args.sample_rate, device)
+    if args.input == '-':
+        return PCMStreamSource(sys.stdin.buffer, args.sample_rate)
+    return FileAudioSource(args.input, realtime=args.realtime)
+
+
+def source_start_time(args):
+    """非实时输入第一个样本对应的时间，声卡输入返回 None（按当前时间记录）
+
+    音频文件以修改时间减去文件时长作为录音开始时间；标准输入按开始监听的时间计。
+    """
+    if args.input == 'device':
+        return None
+    if args.input == '-':
+        return datetime.now()
+
+    import soundfile as sf
+
+    return (datetime.fromtimestamp(os.path.getmtime(args.input))
+            - timedelta(seconds=sf.info(args.input).duration))
+
+
+def print_event(event):
+    """打印监听事件"""
+    event_type = event['type']
+    if event_type == 'transmission_start':
+        print(f"[{event['time']}] 检测到SSTV传输，信噪比 {event['snr']} dB")
+    elif event_type == 'image':
+        print(f"[{event['time']}] 解码完成：{event['image_path']}（模式: {event.get('mode')}，"
+              f"信噪比: {event.get('snr')} dB）")
+    elif event_type in ('decode_failed', 'overrun', 'transmission_discarded'):
+        print(f"[{event['time']}] {event_type}: {event.get('error', '')}")
+
+
+def main(argv=None):
+    """主函数，启动监听直到输入结束或被用户中断"""
+    args = parse_args(argv)
+    service = None
+    try:
+        source = create_source(args)
+        archive = ImageArchive(args.archive)
+        service = AudioCaptureService(source,
+                                      os.path.abspath(args.archive),
+                                      decoder=TriggeredDecoder(archive,
+                                                               start_time=source_start_time(args)))
+        service.add_listener(print_event)
+        service.start()
+        print(f"开始监听（输入: {args.input}，归档目录: {args.archive}），按 Ctrl+C 退出")
+
+        # 声卡输入不会结束，文件/标准输入在读完后退出
+        while not service.wait(timeout=1):
+            pass
+        service.stop()
+    except KeyboardInterrupt:
+        print("\n监听被用户中断")
+        if service is not None:
+            service.stop()
+        return 2
+    except Exception as e:
+        print(f"\n监听发生意外错误：{e}")
+        import traceback
+        traceback.print_exc()
+        return 3
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
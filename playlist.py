@@ -0,0 +1,95 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+SSTV多图像发射序列生成工具
+把多幅图像按顺序合成为一个音频文件，图像之间插入静音和可选的CW呼号识别
+
+用法:
+    python playlist.py -o beacon.wav --item a.jpg Robot36 --item b.png MartinM1
+    python playlist.py -o beacon.wav --list playlist.txt --gap 10 --cw-id BH1ABC
+
+列表文件每行一幅图像：图像路径和模式名称以空白分隔，# 开头的行为注释
+"""
+
+import os
+import sys
+import argparse
+
+from app.config import Config
+from app.encryption.sstv_encoder import SSTVEncoder
+
+
+def parse_args(argv=None):
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description='把多幅图像合成为一个SSTV发射序列音频文件')
+    parser.add_argument('-o', '--output', required=True, help='输出音频文件路径')
+    parser.add_argument('--item', nargs=2, action='append', default=[], metavar=('IMAGE', 'MODE'),
+                        help='添加一幅图像及其模式，可重复使用')
+    parser.add_argument('--list', help='播放列表文件，每行为"图像路径 模式名称"')
+    parser.add_argument('--gap', type=float, default=5.0, help='相邻图像之间的静音秒数')
+    parser.add_argument('--cw-id', default=None, help='每幅图像之后发送的CW呼号')
+    parser.add_argument('--sample-rate', type=int, default=Config.SSTV_SAMPLE_RATE, help='采样率')
+    parser.add_argument('--bits', type=int, default=Config.SSTV_BITS, help='位深')
+    parser.add_argument('--cache', default=Config.SEGMENT_CACHE_FOLDER,
+                        help='单幅图像音频片段缓存目录')
+    parser.add_argument('--no-cache', action='store_true', help='不使用片段缓存')
+    return parser.parse_args(argv)
+
+
+def read_list(path):
+    """读取播放列表文件，相对路径相对于列表文件所在目录"""
+    base = os.path.dirname(os.path.abspath(path))
+    items = []
+    with open(path, encoding='utf-8') as f:
+        for number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            parts = line.rsplit(None, 1)
+            if len(parts) != 2:
+                raise ValueError(f"播放列表第{number}行格式错误: {line}")
+            image_path, mode_name = parts
+            items.append((os.path.join(base, image_path), mode_name))
+    return items
+
+
+def main(argv=None):
+    """主函数，生成发射序列音频"""
+    args = parse_args(argv)
+    try:
+        items = read_list(args.list) if args.list else []
+        items.extend(tuple(item) for item in args.item)
+        if not items:
+            print("错误：请通过 --item 或 --list 指定至少一幅图像")
+            return 1
+
+        result = SSTVEncoder.encode_playlist(items, args.output,
+                                             sample_rate=args.sample_rate,
+                                             bits=args.bits,
+                                             gap_seconds=args.gap,
+                                             cw_id=args.cw_id,
+                                             cache_folder=None if args.no_cache else args.cache)
+        if not result['success']:
+            print(f"生成失败：{result['error']}")
+            return 1
+
+        for item in result['items']:
+            source = '缓存' if item['cached'] else '合成'
+            print(f"  {item['start']:>8.2f}s  {item['mode']:<14} {item['duration']:>7.2f}s  "
+                  f"({source}) {item['image_path']}")
+        print(f"总时长 {result['duration']} 秒，耗时 {result['elapsed_seconds']} 秒")
+    except KeyboardInterrupt:
+        print("\n生成被用户中断")
+        return 2
+    except Exception as e:
+        print(f"\n生成发生意外错误：{e}")
+        import traceback
+        traceback.print_exc()
+        return 3
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,121 @@
+import threading
+import time
+
+import numpy as np
+from PIL import Image
+
+from app.decryption.audio_capture import (AudioCaptureService, GeneratorAudioSource, RingBuffer,
+                                          ThreadedAudioSource, create_capture_service)
+from app.decryption.monitor import TriggeredDecoder
+from app.encryption.line_parallel import synthesize
+from app.encryption.sstv_encoder import SSTVEncoder, get_mode_class
+
+
+class SilenceSource(ThreadedAudioSource):
+    """按实时节拍无限输出静音的输入源"""
+
+    def iter_blocks(self):
+        while not self._stop_event.is_set():
+            yield np.zeros(1024, dtype=np.float32)
+
+
+class CollectingDecoder:
+    """记录送入的全部样本"""
+
+    def __init__(self):
+        self.blocks = []
+
+    def feed(self, samples, sample_rate):
+        self.blocks.append(samples)
+        return []
+
+    def flush(self):
+        return []
+
+
+def test_ring_buffer_reopen_after_close():
+    buffer = RingBuffer(100)
+    buffer.write(np.ones(10))
+    buffer.close()
+    assert not buffer.wait_for(20, timeout=0)
+
+    buffer.reopen()
+    started = time.monotonic()
+    assert not buffer.wait_for(20, timeout=0.2)
+    assert time.monotonic() - started >= 0.2
+
+
+def test_capture_service_restart(tmp_path):
+    service = AudioCaptureService(SilenceSource(8000, realtime=True), str(tmp_path),
+                                  chunk_seconds=0.1)
+    service.start()
+    time.sleep(0.3)
+    service.stop()
+    service.start()
+    try:
+        data = service.record(0.5, timeout=5)
+        assert len(data) == 4000
+        assert service.status()['running']
+    finally:
+        service.stop()
+
+
+def test_blocking_write_splits_oversized_blocks(tmp_path):
+    """非实时输入源一次送入超过缓冲区容量的块时，应分段写入而不丢弃样本"""
+    sample_rate = 1000
+    audio = np.arange(sample_rate * 5, dtype=np.float32)
+    decoder = CollectingDecoder()
+    service = AudioCaptureService(GeneratorAudioSource([audio], sample_rate), str(tmp_path),
+                                  decoder=decoder, buffer_seconds=2, chunk_seconds=0.1)
+    service.start()
+    try:
+        assert service.wait(timeout=10)
+    finally:
+        service.stop()
+
+    assert service.overruns == 0
+    np.testing.assert_array_equal(np.concatenate(decoder.blocks), audio)
+
+
+def test_scheduled_job_and_monitor_produce_image_events(tmp_path):
+    """按应用配置创建的服务：录制解码任务和VIS头触发的连续解码都应发布 image 事件"""
+    sample_rate = 11025
+    image_path = str(tmp_path / 'gradient.png')
+    Image.linear_gradient('L').convert('RGB').resize((320, 240)).save(image_path)
+    instance = SSTVEncoder.create_instance(image_path, get_mode_class('Robot36'), sample_rate, 16)
+    rng = np.random.default_rng(0)
+    audio = np.concatenate([0.05 * rng.standard_normal(sample_rate),
+                            synthesize(instance) / 32768 * 0.5,
+                            0.05 * rng.standard_normal(sample_rate * 5)]).astype(np.float32)
+
+    # 任务登记之后输入源才开始送出音频，保证任务覆盖整段传输
+    scheduled = threading.Event()
+
+    def blocks():
+        scheduled.wait(10)
+        yield audio
+
+    config = {'DATA_FOLDER': str(tmp_path), 'ARCHIVE_FOLDER': str(tmp_path / 'archive')}
+    service = create_capture_service(config, source=GeneratorAudioSource(blocks(), sample_rate))
+    assert isinstance(service.decoder, TriggeredDecoder)
+    service.start()
+    try:
+        job_id = service.schedule_recording(len(audio) / sample_rate)
+        scheduled.set()
+        assert service.wait(timeout=60)
+        # 任务在后台线程中解码
+        deadline = time.monotonic() + 60
+        while time.monotonic() < deadline:
+            images = [event for event in service.get_events() if event['type'] == 'image']
+            if len(images) == 2:
+                break
+            time.sleep(0.1)
+    finally:
+        service.stop()
+
+    job_events = [event for event in images if event.get('job_id') == job_id]
+    assert len(job_events) == 1 and job_events[0]['mode'] == 'Robot36'
+    assert (tmp_path / job_events[0]['image_path']).exists()
+    monitor_events = [event for event in images if 'job_id' not in event]
+    assert len(monitor_events) == 1 and monitor_events[0]['mode'] == 'Robot36'
+    assert (tmp_path / 'archive' / monitor_events[0]['image_path']).exists()
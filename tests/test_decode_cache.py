@@ -0,0 +1,65 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.utils.decode_cache import DecodeCache
+
+
+@pytest.fixture
+def cache(tmp_path):
+    image_folder = tmp_path / 'images'
+    image_folder.mkdir()
+    for index in range(5):
+        (image_folder / f'image{index}.png').write_bytes(b'png')
+    return DecodeCache(str(tmp_path / 'cache'), str(image_folder), max_entries=3)
+
+
+def test_make_key_depends_on_version_and_options():
+    key = DecodeCache.make_key('abc', '1')
+    assert key == DecodeCache.make_key('abc', '1', {})
+    assert key != DecodeCache.make_key('abc', '2')
+    assert key != DecodeCache.make_key('abc', '1', {'mode': 'Robot36'})
+
+
+def test_hit_and_miss(cache):
+    key = DecodeCache.make_key('abc', '1')
+    assert cache.get(key) is None
+
+    cache.put(key, 'image0.png', 'Robot36', snr=12.5)
+    entry = cache.get(key)
+    assert entry['image_path'] == 'image0.png'
+    assert entry['mode'] == 'Robot36'
+    assert entry['snr'] == 12.5
+
+
+def test_missing_image_is_a_miss(cache):
+    key = DecodeCache.make_key('abc', '1')
+    cache.put(key, 'image0.png', 'Robot36')
+    os.remove(os.path.join(cache.image_folder, 'image0.png'))
+
+    assert cache.get(key) is None
+    assert not os.path.exists(cache._entry_path(key))
+
+
+def test_evicts_least_recently_used(cache):
+    keys = [DecodeCache.make_key(f'audio{index}', '1') for index in range(4)]
+    for index, key in enumerate(keys[:3]):
+        cache.put(key, f'image{index}.png', 'Robot36')
+        os.utime(cache._entry_path(key), (1000 + index, 1000 + index))
+    # 命中会刷新修改时间，第一个条目因此不会被淘汰
+    assert cache.get(keys[0]) is not None
+
+    cache.put(keys[3], 'image3.png', 'Robot36')
+    assert cache.get(keys[1]) is None
+    assert all(cache.get(key) is not None for key in (keys[0], keys[2], keys[3]))
+
+
+def test_concurrent_puts_of_the_same_key(cache):
+    key = DecodeCache.make_key('abc', '1')
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        entries = list(executor.map(lambda _: cache.put(key, 'image0.png', 'Robot36'), range(200)))
+
+    assert len(entries) == 200
+    assert cache.get(key)['image_path'] == 'image0.png'
+    assert not [name for name in os.listdir(cache.cache_folder) if name.endswith('.tmp')]
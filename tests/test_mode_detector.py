@@ -0,0 +1,38 @@
+import numpy as np
+import pytest
+from PIL import Image
+
+from app.decryption.sstv_decoder import SSTVDecoder
+from app.encryption.line_parallel import synthesize
+from app.encryption.sstv_encoder import SSTVEncoder, get_mode_class
+
+SAMPLE_RATE = 44100
+# VIS头（引导音、间隔、引导音和10个VIS位）结束的位置（秒）
+VIS_END = 0.91
+
+
+@pytest.fixture(scope='module')
+def striped_image(tmp_path_factory):
+    """纵向渐变加每 8 行一条反色条纹，错一行时误差很大"""
+    pixels = np.array(Image.linear_gradient('L').resize((320, 256)))
+    pixels[::8] = 255 - pixels[::8]
+    path = str(tmp_path_factory.mktemp('modes') / 'striped.png')
+    Image.fromarray(pixels).convert('RGB').save(path)
+    return path, pixels.astype(float)
+
+
+@pytest.mark.parametrize('mode', ['ScottieS1', 'ScottieS2'])
+@pytest.mark.parametrize('cut', [VIS_END - 0.005, VIS_END + 0.015])
+def test_line_period_fallback_keeps_first_line(tmp_path, striped_image, mode, cut):
+    """缺少VIS头（以及 Scottie 起始同步脉冲）时按行周期识别，图像不应错行"""
+    image_path, pixels = striped_image
+    instance = SSTVEncoder.create_instance(image_path, get_mode_class(mode), SAMPLE_RATE, 16)
+    audio = (synthesize(instance) / 32768 * 0.5)[int(cut * SAMPLE_RATE):]
+
+    output_path = str(tmp_path / 'decoded.png')
+    result = SSTVDecoder.decode_samples(audio, SAMPLE_RATE, output_path)
+    assert result['success'] and result['detection'] == 'line_period'
+    assert result['mode'] == mode
+
+    decoded = np.array(Image.open(output_path).convert('L').resize((320, 256)), dtype=float)
+    assert np.abs(decoded - pixels)[2:-2].mean() < 5
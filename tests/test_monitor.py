@@ -0,0 +1,92 @@
+from datetime import datetime
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from app.decryption.audio_capture import AudioCaptureService, GeneratorAudioSource
+from app.decryption.monitor import TriggeredDecoder
+from app.encryption.line_parallel import synthesize
+from app.encryption.sstv_encoder import SSTVEncoder, get_mode_class
+from app.utils.image_archive import ImageArchive
+
+SAMPLE_RATE = 22050
+MODES = ('Robot36', 'MartinM2', 'PD90')
+
+
+@pytest.fixture(scope='module')
+def transmissions(tmp_path_factory):
+    """三次传输，之间以噪声隔开"""
+    image_path = str(tmp_path_factory.mktemp('monitor') / 'gradient.png')
+    Image.linear_gradient('L').convert('RGB').resize((320, 256)).save(image_path)
+
+    rng = np.random.default_rng(0)
+    parts = [0.05 * rng.standard_normal(SAMPLE_RATE * 5)]
+    for mode in MODES:
+        instance = SSTVEncoder.create_instance(image_path, get_mode_class(mode), SAMPLE_RATE, 16)
+        signal = synthesize(instance) / 32768 * 0.5
+        parts.append(signal + 0.05 * rng.standard_normal(len(signal)))
+        parts.append(0.05 * rng.standard_normal(SAMPLE_RATE * 8))
+    return np.concatenate(parts).astype(np.float32)
+
+
+@pytest.mark.parametrize('block_seconds', [1, 30, 1000])
+def test_monitor_archives_every_transmission(tmp_path, transmissions, block_seconds):
+    """非实时输入源一次可能送入包含多次传输的整段音频，每次传输都应被解码归档"""
+    block = block_seconds * SAMPLE_RATE
+    blocks = [transmissions[i:i + block] for i in range(0, len(transmissions), block)]
+    archive = ImageArchive(str(tmp_path))
+    service = AudioCaptureService(GeneratorAudioSource(blocks, SAMPLE_RATE), str(tmp_path),
+                                  decoder=TriggeredDecoder(archive))
+    service.start()
+    try:
+        assert service.wait(timeout=120)
+    finally:
+        service.stop()
+
+    entries = archive.list_entries()
+    assert sorted(entry['mode'] for entry in entries) == sorted(MODES)
+
+
+def test_monitor_times_follow_sample_position(tmp_path, transmissions):
+    """非实时输入源的接收时间由样本位置推算，而不是处理时的当前时间"""
+    start_time = datetime(2024, 5, 1, 12, 0, 0)
+    archive = ImageArchive(str(tmp_path))
+    service = AudioCaptureService(GeneratorAudioSource([transmissions], SAMPLE_RATE), str(tmp_path),
+                                  decoder=TriggeredDecoder(archive, start_time=start_time))
+    service.start()
+    try:
+        assert service.wait(timeout=120)
+    finally:
+        service.stop()
+
+    times = [datetime.strptime(entry['time'], '%Y-%m-%d %H:%M:%S')
+             for entry in reversed(archive.list_entries())]
+    assert len(times) == len(MODES)
+    # 第一次传输在 5 秒噪声之后开始
+    assert abs((times[0] - start_time).total_seconds() - 5) <= 1
+    assert times == sorted(times) and len(set(times)) == len(times)
+
+
+@pytest.mark.parametrize('max_seconds', [None, 60])
+def test_monitor_records_longest_mode(tmp_path, max_seconds):
+    """PasokonP7 约 407 秒：默认上限按最长模式计算，解出VIS头后按模式时长延长上限"""
+    sample_rate = 11025
+    image_path = str(tmp_path / 'gradient.png')
+    Image.linear_gradient('L').convert('RGB').resize((640, 496)).save(image_path)
+    instance = SSTVEncoder.create_instance(image_path, get_mode_class('PasokonP7'), sample_rate, 16)
+    rng = np.random.default_rng(1)
+    signal = synthesize(instance) / 32768 * 0.5
+    audio = np.concatenate([0.05 * rng.standard_normal(sample_rate * 2),
+                            signal + 0.05 * rng.standard_normal(len(signal)),
+                            0.05 * rng.standard_normal(sample_rate * 5)]).astype(np.float32)
+
+    archive = ImageArchive(str(tmp_path / 'archive'))
+    decoder = TriggeredDecoder(archive, max_seconds=max_seconds)
+    events = decoder.feed(audio, sample_rate) + decoder.flush()
+
+    images = [event for event in events if event['type'] == 'image']
+    assert len(images) == 1
+    assert images[0]['mode'] == 'PasokonP7'
+    assert not images[0]['partial']
+    assert images[0]['duration'] > 400
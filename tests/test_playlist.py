@@ -0,0 +1,115 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+import soundfile as sf
+from PIL import Image
+
+from app.encryption.playlist import SegmentCache, SSTVPlaylist, cw_elements, gen_cw_chunks
+from app.encryption.sstv_encoder import SSTVEncoder
+
+SAMPLE_RATE = 11025
+
+
+@pytest.fixture(scope='module')
+def images(tmp_path_factory):
+    folder = tmp_path_factory.mktemp('playlist')
+    paths = []
+    for index, color in enumerate(('red', 'blue')):
+        path = str(folder / f'image{index}.png')
+        Image.new('RGB', (320, 240), color).save(path)
+        paths.append(path)
+    return paths
+
+
+def test_cw_elements_follow_paris_timing():
+    # E = .  T = -  字符间隔 3 单位，单词间隔 7 单位
+    assert cw_elements('et t') == [(True, 1), (False, 3), (True, 3), (False, 7), (True, 3)]
+    assert cw_elements('A') == [(True, 1), (False, 1), (True, 3)]
+
+
+def test_cw_chunks_length():
+    unit = int(round(1.2 / 20 * SAMPLE_RATE))
+    chunks = list(gen_cw_chunks('BG1ABC', SAMPLE_RATE))
+    assert sum(len(chunk) for chunk in chunks) == unit * sum(units for _, units in cw_elements('BG1ABC'))
+    assert all(chunk.dtype == np.int16 for chunk in chunks)
+
+
+def test_invalid_callsign_is_rejected_before_writing(tmp_path, images):
+    with pytest.raises(ValueError):
+        SSTVPlaylist(SAMPLE_RATE, cw_id='BG1#')
+
+    output_path = str(tmp_path / 'playlist.wav')
+    result = SSTVEncoder.encode_playlist([(images[0], 'Robot36')], output_path,
+                                         sample_rate=SAMPLE_RATE, cw_id='BG1#')
+    assert not result['success']
+    assert not os.path.exists(output_path)
+
+
+def test_failed_write_removes_output(tmp_path, images):
+    missing = str(tmp_path / 'missing.png')
+    Image.new('RGB', (320, 240)).save(missing)
+    playlist = SSTVPlaylist(SAMPLE_RATE)
+    playlist.add(images[0], 'Robot36')
+    playlist.add(missing, 'Robot36')
+    os.remove(missing)
+
+    output_path = str(tmp_path / 'playlist.wav')
+    with pytest.raises(Exception):
+        playlist.write(output_path)
+    assert not os.path.exists(output_path)
+
+
+@pytest.mark.parametrize('parallel', [False, True])
+def test_playlist_output_and_segment_cache(tmp_path, images, parallel):
+    cache = SegmentCache(str(tmp_path / 'cache'))
+    items = [(images[0], 'Robot36'), (images[1], 'Robot36'), (images[0], 'Robot36')]
+
+    def write(name):
+        with ThreadPoolExecutor(max_workers=3) as pool:
+            playlist = SSTVPlaylist(SAMPLE_RATE, gap_seconds=1.0, cw_id='BG1ABC', cache=cache,
+                                    worker_pool=pool if parallel else None)
+            for image_path, mode_name in items:
+                playlist.add(image_path, mode_name)
+            return playlist.write(str(tmp_path / name))
+
+    first = write('first.wav')
+    audio, sample_rate = sf.read(first['output_path'], dtype='int16')
+    assert sample_rate == SAMPLE_RATE
+    assert len(audio) / SAMPLE_RATE == pytest.approx(first['duration'], abs=1e-3)
+    starts = [item['start'] for item in first['items']]
+    assert starts == sorted(starts) and starts[0] == 0
+    # Robot36 约 36 秒
+    assert all(35 < item['duration'] < 38 for item in first['items'])
+    # 同一图像第二次出现时直接读取缓存（并行时两幅都已预先合成）
+    assert [item['cached'] for item in first['items']] == ([True] * 3 if parallel else [False, False, True])
+    assert len(os.listdir(cache.cache_folder)) == 2
+
+    second = write('second.wav')
+    assert all(item['cached'] for item in second['items'])
+    np.testing.assert_array_equal(sf.read(second['output_path'], dtype='int16')[0], audio)
+
+
+def test_segment_cache_temp_paths_are_unique(tmp_path):
+    cache = SegmentCache(str(tmp_path))
+    paths = {cache.temp_path('key') for _ in range(10)}
+    assert len(paths) == 10
+    assert all(os.path.dirname(path) == str(tmp_path) for path in paths)
+
+
+def test_segment_cache_evicts_least_recently_used(tmp_path):
+    cache = SegmentCache(str(tmp_path), max_entries=2)
+    for index, key in enumerate(('a', 'b')):
+        temp_path = cache.temp_path(key)
+        sf.write(temp_path, np.zeros(10, dtype=np.int16), SAMPLE_RATE, format='WAV')
+        cache.commit(temp_path, key)
+        os.utime(cache.path(key), (1000 + index, 1000 + index))
+    assert cache.get('a') is not None
+
+    temp_path = cache.temp_path('c')
+    sf.write(temp_path, np.zeros(10, dtype=np.int16), SAMPLE_RATE, format='WAV')
+    cache.commit(temp_path, 'c')
+    assert cache.get('b') is None
+    assert cache.get('a') is not None and cache.get('c') is not None
+    assert sorted(os.listdir(str(tmp_path))) == sorted(os.path.basename(cache.path(key)) for key in 'ac')
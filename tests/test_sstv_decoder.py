@@ -0,0 +1,79 @@
+import numpy as np
+import pytest
+from PIL import Image
+
+from app.decryption.sstv_decoder import SSTVDecoder
+from app.encryption.line_parallel import synthesize
+from app.encryption.sstv_encoder import SSTVEncoder, get_mode_class
+
+SAMPLE_RATE = 22050
+
+
+def encode(image_path, mode='Robot36'):
+    instance = SSTVEncoder.create_instance(image_path, get_mode_class(mode), SAMPLE_RATE, 16)
+    return synthesize(instance) / 32768 * 0.5
+
+
+@pytest.fixture(scope='module')
+def noisy_robot36(tmp_path_factory):
+    image_path = str(tmp_path_factory.mktemp('decoder') / 'gradient.png')
+    Image.linear_gradient('L').convert('RGB').resize((320, 256)).save(image_path)
+    clean = encode(image_path)
+    return clean + 0.2 * np.random.default_rng(1).standard_normal(len(clean))
+
+
+@pytest.mark.parametrize('fraction', [0.6, 0.3])
+def test_truncated_capture_reports_snr_of_received_lines(tmp_path, noisy_robot36, fraction):
+    """录音不完整时，没有接收到的行不参与信噪比统计"""
+    output_path = str(tmp_path / 'decoded.png')
+    full = SSTVDecoder.decode_samples(noisy_robot36, SAMPLE_RATE, output_path)
+    truncated = SSTVDecoder.decode_samples(noisy_robot36[:int(len(noisy_robot36) * fraction)],
+                                           SAMPLE_RATE, output_path)
+    assert abs(truncated['snr'] - full['snr']) < 3
+    assert truncated['partial'] and not full['partial']
+
+
+def test_line_snr_is_nan_outside_received_audio():
+    spec = {'line_ms': 100.0, 'sync_ms': 10.0}
+    freq = np.full(1000, 1200.0)
+    snr = SSTVDecoder.estimate_line_snr(freq, 1000, spec, np.array([0.0, 500.0, 995.0, 2000.0]), 100.0)
+    assert snr[0] == snr[1] == 60.0
+    assert np.isnan(snr[2]) and np.isnan(snr[3])
+
+
+def test_mostly_missing_capture_is_rejected(tmp_path, noisy_robot36):
+    result = SSTVDecoder.decode_samples(noisy_robot36[:len(noisy_robot36) // 10], SAMPLE_RATE,
+                                        str(tmp_path / 'decoded.png'))
+    assert not result['success']
+    assert result['lines_received'] < 0.25 * 240
+
+
+@pytest.fixture(scope='module')
+def vertical_bars(tmp_path_factory):
+    """竖条纹图像，行周期估计错误时条纹会明显倾斜"""
+    pixels = np.zeros((240, 320), dtype=np.uint8)
+    for x in range(0, 320, 40):
+        pixels[:, x:x + 12] = 255
+    path = str(tmp_path_factory.mktemp('drift') / 'bars.png')
+    Image.fromarray(pixels).convert('RGB').save(path)
+    return path, pixels.astype(float)
+
+
+@pytest.mark.parametrize('ppm', [-1000, -300, 300, 1000])
+def test_sample_rate_drift_is_recovered(tmp_path, vertical_bars, ppm):
+    """发送端时钟偏差 ppm 时，解码器应测出该偏差并校正斜率"""
+    from scipy.signal import resample
+
+    image_path, pixels = vertical_bars
+    audio = encode(image_path)
+    drifted = resample(audio, int(round(len(audio) * (1 + ppm * 1e-6))))
+
+    output_path = str(tmp_path / 'decoded.png')
+    result = SSTVDecoder.decode_samples(drifted, SAMPLE_RATE, output_path)
+    assert result['success']
+    assert abs(result['drift_ppm'] - ppm) < 50
+
+    decoded = np.array(Image.open(output_path).convert('L'), dtype=float)
+    # 顶部和底部各取 20 行比较：未校正时 1000 ppm 会使底部条纹偏移一百多个像素
+    assert np.abs(decoded[:20] - pixels[:20]).mean() < 20
+    assert np.abs(decoded[-20:] - pixels[-20:]).mean() < 20
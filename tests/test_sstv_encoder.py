@@ -0,0 +1,34 @@
+import numpy as np
+import pytest
+import soundfile as sf
+from PIL import Image
+
+from app.decryption.sstv_decoder import SSTVDecoder
+from app.encryption.sstv_encoder import SSTVEncoder
+
+
+@pytest.fixture(scope='module')
+def gradient_image(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp('encoder') / 'gradient.png')
+    Image.linear_gradient('L').convert('RGB').resize((320, 256)).save(path)
+    return path
+
+
+@pytest.mark.parametrize('parallel', [False, True])
+def test_encoded_audio_is_a_sine_not_a_square_wave(tmp_path, gradient_image, parallel):
+    audio_path = str(tmp_path / 'robot36.wav')
+    result = SSTVEncoder.encode_image(gradient_image, audio_path, 'Robot36', parallel=parallel)
+    assert result['success']
+
+    audio, _ = sf.read(audio_path, dtype='int16')
+    assert len(np.unique(audio)) > 10000
+    # 方波的样本几乎全部处于满量程
+    assert np.mean(np.abs(audio.astype(np.int32)) >= 32767) < 0.01
+
+    decoded = SSTVDecoder.decode_audio(audio_path, str(tmp_path / 'decoded.png'))
+    assert decoded['success'] and decoded['snr'] > 40
+
+
+def test_to_pcm_scales_other_bit_depths():
+    assert SSTVEncoder.to_pcm([127, -128, 64], bits=8).tolist() == [32512, -32768, 16384]
+    assert SSTVEncoder.to_pcm([32767, -32768, 0]).tolist() == [32767, -32768, 0]
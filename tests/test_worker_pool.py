@@ -0,0 +1,65 @@
+import pickle
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from app.decryption.sstv_decoder import SSTVDecoder
+from app.encryption.line_parallel import synthesize
+from app.encryption.sstv_encoder import SSTVEncoder, get_mode_class
+from app.utils import worker_pool
+from app.utils.worker_pool import SharedArray, SharedWorkerPool, get_worker_pool
+
+
+def test_shared_array_round_trip_and_unlink():
+    data = np.arange(100000, dtype=np.float32)
+    shared = SharedArray.from_array(data)
+    try:
+        # 反序列化后映射同一块共享内存
+        copy = pickle.loads(pickle.dumps(shared))
+        np.testing.assert_array_equal(copy.array, data)
+        copy.array[0] = -1
+        assert shared.array[0] == -1
+        copy.close()
+    finally:
+        name = shared.name
+        shared.unlink()
+
+    with pytest.raises(FileNotFoundError):
+        SharedArray(data.shape, data.dtype, name=name)
+
+
+def test_pool_reads_and_writes_shared_arrays():
+    pool = SharedWorkerPool(2, warmup=False, context='spawn')
+    data = np.random.default_rng(0).standard_normal(100000).astype(np.float32)
+    output = SharedWorkerPool.empty(data.shape)
+    try:
+        # 大数组参数自动经共享内存传递，结果直接写入共享输出数组
+        pool.submit(np.copyto, output, data).result(timeout=60)
+        np.testing.assert_array_equal(output.array, data)
+        assert pool.submit(np.sum, data).result(timeout=60) == pytest.approx(data.sum(), rel=1e-4)
+    finally:
+        output.unlink()
+        pool.shutdown()
+
+
+def test_get_worker_pool_decodes_without_fork(tmp_path, monkeypatch):
+    monkeypatch.setattr(worker_pool, '_worker_pool', None)
+    assert get_worker_pool({'WORKER_PROCESSES': 0}) is None
+
+    sample_rate = 11025
+    image_path = str(tmp_path / 'gradient.png')
+    Image.linear_gradient('L').convert('RGB').resize((320, 240)).save(image_path)
+    instance = SSTVEncoder.create_instance(image_path, get_mode_class('Robot36'), sample_rate, 16)
+    audio = (synthesize(instance) / 32768 * 0.5).astype(np.float32)
+
+    config = {'WORKER_PROCESSES': 1, 'SSTV_SAMPLE_RATE': sample_rate}
+    pool = get_worker_pool(config)
+    try:
+        assert pool._executor._mp_context.get_start_method() in ('forkserver', 'spawn')
+        assert get_worker_pool(config) is pool
+        result = pool.submit(SSTVDecoder.decode_samples, audio, sample_rate,
+                             str(tmp_path / 'decoded.jpg')).result(timeout=120)
+        assert result['success'] and result['mode'] == 'Robot36'
+    finally:
+        pool.shutdown()